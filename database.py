@@ -1,47 +1,780 @@
-import sqlite3
 import os
+import re
+import sqlite3
+import time
+import threading
+import weakref
+import itertools
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Every column of the games table, in table order
+GAME_COLUMNS = ('id', 'title', 'swf_path', 'thumbnail_path', 'added_date', 'last_played', 'play_count', 'content_hash',
+                'swf_signature', 'swf_version', 'swf_length', 'stage_width', 'stage_height', 'frame_rate', 'frame_count',
+                'play_seconds')
+
+# Columns filled from the SWF file header, in swf.SwfHeader field order.
+# swf_signature is NULL until the file has been parsed and '' if it isn't a readable SWF.
+HEADER_COLUMNS = ('swf_signature', 'swf_version', 'swf_length', 'stage_width', 'stage_height', 'frame_rate', 'frame_count')
+UNREADABLE_HEADER = ('',) + (None,) * (len(HEADER_COLUMNS) - 1)
+
+# The columns the library grid needs to draw a card
+CARD_COLUMNS = ('id', 'title', 'swf_path', 'thumbnail_path', 'play_count')
+
+# One row of games. A namedtuple has no per-instance __dict__, so it costs no
+# more than a plain tuple; columns left out of a query are None.
+Game = namedtuple('Game', GAME_COLUMNS, defaults=(None,) * len(GAME_COLUMNS))
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced (the built-in type can't)"""
+
 
 class GameDatabase:
-    def __init__(self, db_path="data/library.db"):
+    """Access to the games table, safe to use from any thread
+    
+    Every thread reads through its own connection, so imports, hashing and
+    cover fetching can run in background threads without sharing a
+    connection with the GUI. A thread's connection is closed when the
+    thread ends, so short-lived pool threads don't leave connections
+    behind. All writes go through one writer connection, one transaction
+    at a time (see writer()), so SQLite never sees two writers competing
+    for the lock.
+    """
+    
+    def __init__(self, db_path="data/games.db"):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
+        self.db_path = db_path
+        self.local = threading.local()
+        # Weak, so a reader connection goes away (and closes) with the thread-local of the thread that opened it
+        self.connections = weakref.WeakSet()
+        self.connections_lock = threading.Lock()
+        self.write_lock = threading.RLock()
+        # Used only while holding write_lock, possibly from several threads
+        self.write_conn = self.connect(check_same_thread=False)
         self.create_tables()
+        self.ensure_indexes()
+        self.fts_enabled = self.create_search_index()
+    
+    def connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread, timeout=30, factory=Connection)
+        self.configure_connection(conn)
+        with self.connections_lock:
+            self.connections.add(conn)
+        return conn
+    
+    @staticmethod
+    def configure_connection(conn):
+        """Apply journal and cache pragmas; these are per-connection so run them at connect time"""
+        cursor = conn.cursor()
+        # WAL lets readers carry on while a write commits, and commits only append to the log
+        journal_mode = cursor.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            print(f"SQLite WAL mode unavailable, using journal_mode={journal_mode}")
+        # NORMAL is crash-safe with WAL and skips the fsync on every commit
+        cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.execute('PRAGMA cache_size = -16000')  # ~16 MB page cache
+        cursor.execute('PRAGMA mmap_size = 268435456')  # map up to 256 MB of the file
+        cursor.execute('PRAGMA temp_store = MEMORY')
+    
+    def reader(self):
+        """Return a cursor on the calling thread's own connection, opening it on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = self.connect()
+        return conn.cursor()
+    
+    @contextmanager
+    def writer(self):
+        """Run a block of writes as one transaction on the shared writer connection
+        
+        Blocks until no other thread is writing. Commits when the block
+        ends, rolls back if it raises.
+        """
+        with self.write_lock:
+            with self.write_conn:
+                yield self.write_conn.cursor()
+    
+    def close(self):
+        """Close every connection opened by this database, on all threads"""
+        with self.connections_lock:
+            connections, self.connections = list(self.connections), weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connections of other threads can only be closed by their thread
+                pass
+        self.local = threading.local()
+    
+    @staticmethod
+    def select_list(columns, table='games'):
+        """Return the SELECT list for columns, refusing names that aren't game columns"""
+        unknown = [column for column in columns if column not in GAME_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown game columns: {', '.join(unknown)}")
+        return ', '.join(f'{table}.{column}' for column in columns)
+    
+    @staticmethod
+    def to_games(rows, columns):
+        """Wrap rows selected with select_list(columns) in Game records"""
+        if tuple(columns) == GAME_COLUMNS:
+            return list(map(Game._make, rows))
+        return [Game(**dict(zip(columns, row))) for row in rows]
     
     def create_tables(self):
-        cursor = self.conn.cursor()
+        with self.writer() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS games (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    swf_path TEXT NOT NULL,
+                    thumbnail_path TEXT,
+                    added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_played TIMESTAMP,
+                    play_count INTEGER DEFAULT 0,
+                    content_hash TEXT,
+                    swf_signature TEXT,
+                    swf_version INTEGER,
+                    swf_length INTEGER,
+                    stage_width INTEGER,
+                    stage_height INTEGER,
+                    frame_rate REAL,
+                    frame_count INTEGER,
+                    play_seconds REAL DEFAULT 0
+                )
+            ''')
+            
+            # Columns added after the first release, for databases created before them
+            cursor.execute("SELECT name FROM pragma_table_info('games')")
+            existing = {row[0] for row in cursor.fetchall()}
+            for column, definition in self.ADDED_COLUMNS.items():
+                if column not in existing:
+                    print(f"Adding database column: {column}")
+                    cursor.execute(f'ALTER TABLE games ADD COLUMN {column} {definition}')
+            
+            # Last seen state of every SWF file in the watched folders (see ui.watcher)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS watch_manifest (
+                    path TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    game_id INTEGER
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_watch_manifest_root ON watch_manifest(root)')
+            
+            # Stored files that compression was tried on, by content hash; stored_size equals
+            # original_size when compressing didn't pay off (see swf.compress_swf)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS vault_compression (
+                    content_hash TEXT PRIMARY KEY,
+                    original_size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL
+                )
+            ''')
+            
+            self.create_play_stats_tables(cursor)
+    
+    def create_play_stats_tables(self, cursor):
+        """Create the play session history and the rollups the triggers below keep current
+        
+        library_stats holds one row of library-wide totals and play_days one
+        row per local calendar day, so the header and the stats view read
+        them without aggregating over games or play_sessions. Every change
+        to games or play_sessions adjusts them by the difference it makes.
+        Per-day activity is history: it isn't taken back when a game is
+        removed, while the totals always describe the games in the library.
+        """
+        # One row per finished run of the Flash player; times are UTC like CURRENT_TIMESTAMP
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS games (
+            CREATE TABLE IF NOT EXISTS play_sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                swf_path TEXT NOT NULL,
-                thumbnail_path TEXT,
-                added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_played TIMESTAMP,
-                play_count INTEGER DEFAULT 0
+                game_id INTEGER NOT NULL,
+                started_at TIMESTAMP NOT NULL,
+                ended_at TIMESTAMP NOT NULL,
+                duration REAL NOT NULL,
+                exit_code INTEGER,
+                crashed INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_play_sessions_game ON play_sessions(game_id, started_at)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS play_days (
+                day TEXT PRIMARY KEY,
+                plays INTEGER NOT NULL DEFAULT 0,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                seconds REAL NOT NULL DEFAULT 0
             )
         ''')
-        self.conn.commit()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS library_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                game_count INTEGER NOT NULL,
+                total_plays INTEGER NOT NULL,
+                session_count INTEGER NOT NULL,
+                total_seconds REAL NOT NULL
+            )
+        ''')
+        cursor.execute('SELECT 1 FROM library_stats')
+        if cursor.fetchone() is None:
+            # First run with rollups: one scan to seed them from the games already there
+            cursor.execute('''
+                INSERT INTO library_stats (id, game_count, total_plays, session_count, total_seconds)
+                SELECT 1, COUNT(*), COALESCE(SUM(play_count), 0),
+                       (SELECT COUNT(*) FROM play_sessions), COALESCE(SUM(play_seconds), 0)
+                FROM games
+            ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS games_stats_insert AFTER INSERT ON games BEGIN
+                UPDATE library_stats
+                SET game_count = game_count + 1,
+                    total_plays = total_plays + COALESCE(new.play_count, 0),
+                    total_seconds = total_seconds + COALESCE(new.play_seconds, 0)
+                WHERE id = 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS games_stats_delete AFTER DELETE ON games BEGIN
+                UPDATE library_stats
+                SET game_count = game_count - 1,
+                    total_plays = total_plays - COALESCE(old.play_count, 0),
+                    total_seconds = total_seconds - COALESCE(old.play_seconds, 0),
+                    session_count = session_count - (SELECT COUNT(*) FROM play_sessions WHERE game_id = old.id)
+                WHERE id = 1;
+                DELETE FROM play_sessions WHERE game_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS games_stats_update AFTER UPDATE OF play_count, play_seconds ON games BEGIN
+                UPDATE library_stats
+                SET total_plays = total_plays + COALESCE(new.play_count, 0) - COALESCE(old.play_count, 0),
+                    total_seconds = total_seconds + COALESCE(new.play_seconds, 0) - COALESCE(old.play_seconds, 0)
+                WHERE id = 1;
+                INSERT INTO play_days (day, plays)
+                SELECT date(new.last_played, 'localtime'), new.play_count - COALESCE(old.play_count, 0)
+                WHERE new.play_count > COALESCE(old.play_count, 0) AND new.last_played IS NOT NULL
+                ON CONFLICT(day) DO UPDATE SET plays = plays + excluded.plays;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS play_sessions_stats_insert AFTER INSERT ON play_sessions BEGIN
+                UPDATE library_stats SET session_count = session_count + 1 WHERE id = 1;
+                UPDATE games SET play_seconds = COALESCE(play_seconds, 0) + new.duration WHERE id = new.game_id;
+                INSERT INTO play_days (day, sessions, seconds)
+                VALUES (date(new.started_at, 'localtime'), 1, new.duration)
+                ON CONFLICT(day) DO UPDATE SET sessions = sessions + 1, seconds = seconds + excluded.seconds;
+            END
+        ''')
+    
+    # Columns that older databases may lack: name -> type
+    ADDED_COLUMNS = {
+        # SHA-256 of the SWF file, see ui.importer.store_content
+        'content_hash': 'TEXT',
+        # SWF header fields, see swf.read_swf_header
+        'swf_signature': 'TEXT',
+        'swf_version': 'INTEGER',
+        'swf_length': 'INTEGER',
+        'stage_width': 'INTEGER',
+        'stage_height': 'INTEGER',
+        'frame_rate': 'REAL',
+        'frame_count': 'INTEGER',
+        # Seconds spent in the game, summed from play_sessions by a trigger
+        'play_seconds': 'REAL DEFAULT 0',
+    }
+    
+    # Indexes every library query relies on: name -> CREATE statement
+    INDEXES = {
+        'idx_games_swf_path': 'CREATE INDEX IF NOT EXISTS idx_games_swf_path ON games(swf_path)',
+        'idx_games_title_nocase': 'CREATE INDEX IF NOT EXISTS idx_games_title_nocase ON games(title COLLATE NOCASE)',
+        'idx_games_content_hash': 'CREATE INDEX IF NOT EXISTS idx_games_content_hash ON games(content_hash)',
+        'idx_games_swf_version': 'CREATE INDEX IF NOT EXISTS idx_games_swf_version ON games(swf_version)',
+        'idx_games_stage_size': 'CREATE INDEX IF NOT EXISTS idx_games_stage_size ON games(stage_width, stage_height)',
+        'idx_games_frame_rate': 'CREATE INDEX IF NOT EXISTS idx_games_frame_rate ON games(frame_rate)',
+        'idx_games_swf_signature': 'CREATE INDEX IF NOT EXISTS idx_games_swf_signature ON games(swf_signature)',
+        # Most played and recently played lists; the rowid in every index entry breaks ties
+        'idx_games_play_count': 'CREATE INDEX IF NOT EXISTS idx_games_play_count ON games(play_count)',
+        'idx_games_play_seconds': 'CREATE INDEX IF NOT EXISTS idx_games_play_seconds ON games(play_seconds)',
+        'idx_games_last_played': 'CREATE INDEX IF NOT EXISTS idx_games_last_played ON games(last_played)',
+    }
+    
+    def ensure_indexes(self):
+        """Check the expected indexes exist at startup and create any that are missing"""
+        with self.writer() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'games'")
+            existing = {row[0] for row in cursor.fetchall()}
+            
+            missing = [name for name in self.INDEXES if name not in existing]
+            for name in missing:
+                print(f"Creating missing database index: {name}")
+                cursor.execute(self.INDEXES[name])
+            
+            if missing:
+                cursor.execute('ANALYZE games')
+    
+    # Columns of games mirrored into the full-text index; add metadata columns here and the index is rebuilt
+    FTS_COLUMNS = ('title',)
+    
+    def create_search_index(self):
+        """Create the games_fts FTS5 index and the triggers that keep it in sync with games
+        
+        Returns False if this SQLite build has no FTS5, in which case search falls back to LIKE.
+        """
+        columns = ', '.join(self.FTS_COLUMNS)
+        new_values = ', '.join(f'new.{column}' for column in self.FTS_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in self.FTS_COLUMNS)
+        
+        try:
+            with self.writer() as cursor:
+                cursor.execute("SELECT name FROM pragma_table_info('games_fts')")
+                existing_columns = tuple(row[0] for row in cursor.fetchall())
+                if existing_columns == self.FTS_COLUMNS:
+                    return True
+                
+                # Missing, or built for a different set of columns: (re)create and backfill
+                if existing_columns:
+                    print("Rebuilding full-text search index for new columns")
+                for trigger in ('games_fts_insert', 'games_fts_delete', 'games_fts_update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                cursor.execute('DROP TABLE IF EXISTS games_fts')
+                
+                cursor.execute(f'''
+                    CREATE VIRTUAL TABLE games_fts USING fts5(
+                        {columns},
+                        content='games',
+                        content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2',
+                        prefix='2 3'
+                    )
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER games_fts_insert AFTER INSERT ON games BEGIN
+                        INSERT INTO games_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER games_fts_delete AFTER DELETE ON games BEGIN
+                        INSERT INTO games_fts(games_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER games_fts_update AFTER UPDATE OF {columns} ON games BEGIN
+                        INSERT INTO games_fts(games_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                        INSERT INTO games_fts(rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                ''')
+                cursor.execute("INSERT INTO games_fts(games_fts) VALUES ('rebuild')")
+            return True
+        
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, falling back to LIKE: {e}")
+            return False
+    
+    @staticmethod
+    def fts_query(text):
+        """Turn free text into an FTS5 query matching every word as a prefix"""
+        words = re.findall(r'\w+', text)
+        return ' '.join(f'"{word}"*' for word in words)
+    
+    def search_games(self, text, columns=GAME_COLUMNS):
+        """Return the games matching text, best matches first"""
+        cursor = self.reader()
+        select = self.select_list(columns)
+        
+        if self.fts_enabled:
+            query = self.fts_query(text)
+            if not query:
+                return []
+            cursor.execute(f'''
+                SELECT {select} FROM games_fts
+                JOIN games ON games.id = games_fts.rowid
+                WHERE games_fts MATCH ?
+                ORDER BY games_fts.rank, games.title COLLATE NOCASE
+            ''', (query,))
+            return self.to_games(cursor.fetchall(), columns)
+        
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        cursor.execute(
+            f"SELECT {select} FROM games WHERE title LIKE ? ESCAPE '\\' ORDER BY title COLLATE NOCASE, id",
+            (pattern,))
+        return self.to_games(cursor.fetchall(), columns)
+    
+    @staticmethod
+    def header_values(header):
+        """Return the HEADER_COLUMNS values of a swf.SwfHeader, all None for a file not parsed yet"""
+        return tuple(header) if header is not None else (None,) * len(HEADER_COLUMNS)
+    
+    INSERT_GAME = (
+        f'INSERT INTO games (title, swf_path, thumbnail_path, content_hash, {", ".join(HEADER_COLUMNS)}) '
+        f'VALUES ({", ".join("?" * (4 + len(HEADER_COLUMNS)))})')
+    
+    def add_game(self, title, swf_path, thumbnail_path=None, content_hash=None, header=None):
+        with self.writer() as cursor:
+            cursor.execute(
+                self.INSERT_GAME,
+                (title, swf_path, thumbnail_path, content_hash) + self.header_values(header))
+            return cursor.lastrowid
+    
+    def add_games(self, games, chunk_size=500):
+        """Insert (title, swf_path, thumbnail_path[, content_hash[, header]]) tuples in one transaction and return their new ids
+        
+        games may be any iterable, including a generator; rows are read and
+        inserted chunk_size at a time and committed once at the end, so a
+        failure part-way leaves the table untouched.
+        """
+        ids = []
+        games = iter(games)
+        with self.writer() as cursor:
+            while True:
+                chunk = list(itertools.islice(games, chunk_size))
+                if not chunk:
+                    break
+                for game in chunk:
+                    title, swf_path, thumbnail_path, *rest = game
+                    content_hash = rest[0] if rest else None
+                    header = rest[1] if len(rest) > 1 else None
+                    cursor.execute(
+                        self.INSERT_GAME,
+                        (title, swf_path, thumbnail_path, content_hash) + self.header_values(header))
+                    ids.append(cursor.lastrowid)
+        return ids
+    
+    def get_all_games(self, columns=GAME_COLUMNS):
+        """Return every game; prefer iter_games or get_games_page on large libraries"""
+        cursor = self.reader()
+        cursor.execute(f'SELECT {self.select_list(columns)} FROM games ORDER BY title COLLATE NOCASE, id')
+        return self.to_games(cursor.fetchall(), columns)
+    
+    def get_games_page(self, after=None, limit=100, columns=GAME_COLUMNS):
+        """Return up to limit games ordered case-insensitively by (title, id), starting after the (title, id) key given
+        
+        Each page is an index seek, so its cost doesn't grow with the library.
+        """
+        cursor = self.reader()
+        select = self.select_list(columns)
+        if after is None:
+            cursor.execute(f'SELECT {select} FROM games ORDER BY title COLLATE NOCASE, id LIMIT ?', (limit,))
+        else:
+            title, game_id = after
+            # The >= term lets SQLite seek the title index instead of scanning it
+            cursor.execute(f'''
+                SELECT {select} FROM games
+                WHERE title COLLATE NOCASE >= ? AND (title COLLATE NOCASE > ? OR id > ?)
+                ORDER BY title COLLATE NOCASE, id
+                LIMIT ?
+            ''', (title, title, game_id, limit))
+        return self.to_games(cursor.fetchall(), columns)
+    
+    def iter_games(self, columns=GAME_COLUMNS, page_size=500):
+        """Yield every game in (title, id) order, holding only one page in memory"""
+        # The keyset needs title and id even if the caller didn't ask for them
+        columns = tuple(columns) + tuple(column for column in ('id', 'title') if column not in columns)
+        after = None
+        while True:
+            games = self.get_games_page(after, page_size, columns)
+            yield from games
+            if len(games) < page_size:
+                return
+            after = (games[-1].title, games[-1].id)
     
-    def add_game(self, title, swf_path, thumbnail_path=None):
-        cursor = self.conn.cursor()
+    def get_library_totals(self):
+        """Return (number of games, total plays), read from the library_stats rollup"""
+        return self.get_library_stats()[:2]
+    
+    def get_library_stats(self):
+        """Return (number of games, total plays, play sessions, seconds played); one row, whatever the library size"""
+        cursor = self.reader()
+        cursor.execute('SELECT game_count, total_plays, session_count, total_seconds FROM library_stats WHERE id = 1')
+        return cursor.fetchone() or (0, 0, 0, 0.0)
+    
+    def add_play_session(self, game_id, started_at, ended_at, duration, exit_code=None, crashed=False):
+        """Record a finished play session; started_at and ended_at are Unix times"""
+        with self.writer() as cursor:
+            cursor.execute('''
+                INSERT INTO play_sessions (game_id, started_at, ended_at, duration, exit_code, crashed)
+                VALUES (?, datetime(?, 'unixepoch'), datetime(?, 'unixepoch'), ?, ?, ?)
+            ''', (game_id, int(started_at), int(ended_at), duration, exit_code, int(crashed)))
+    
+    def get_play_days(self, days=14):
+        """Return (day, plays, sessions, seconds) for the last days local calendar days with any activity, newest first"""
+        cursor = self.reader()
         cursor.execute('''
-            INSERT INTO games (title, swf_path, thumbnail_path)
-            VALUES (?, ?, ?)
-        ''', (title, swf_path, thumbnail_path))
-        self.conn.commit()
-        return cursor.lastrowid
+            SELECT day, plays, sessions, seconds FROM play_days
+            WHERE day > date('now', 'localtime', ?)
+            ORDER BY day DESC
+        ''', (f'-{days} days',))
+        return cursor.fetchall()
     
-    def get_all_games(self):
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM games ORDER BY title')
+    def get_game_sessions(self, game_id, limit=20):
+        """Return the latest (started_at, ended_at, duration, exit_code, crashed) sessions of a game"""
+        cursor = self.reader()
+        cursor.execute('''
+            SELECT started_at, ended_at, duration, exit_code, crashed FROM play_sessions
+            WHERE game_id = ? ORDER BY started_at DESC LIMIT ?
+        ''', (game_id, limit))
         return cursor.fetchall()
     
+    # Ranking column -> WHERE and ORDER BY of the matching index scan
+    RANKINGS = {
+        'play_count': ('play_count > 0', 'play_count DESC, id DESC'),
+        'play_seconds': ('play_seconds > 0', 'play_seconds DESC, id DESC'),
+        'last_played': ('last_played IS NOT NULL', 'last_played DESC, id DESC'),
+    }
+    
+    def get_top_games(self, ranking='play_count', limit=10, columns=GAME_COLUMNS):
+        """Return the limit most played (play_count, play_seconds) or most recently played (last_played) games
+        
+        Each ranking reads its index backwards and stops after limit rows.
+        """
+        where, order = self.RANKINGS[ranking]
+        cursor = self.reader()
+        cursor.execute(f'SELECT {self.select_list(columns)} FROM games WHERE {where} ORDER BY {order} LIMIT ?', (limit,))
+        return self.to_games(cursor.fetchall(), columns)
+    
     def update_play_stats(self, game_id):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE games 
-            SET last_played = CURRENT_TIMESTAMP, 
-                play_count = play_count + 1 
-            WHERE id = ?
-        ''', (game_id,))
-        self.conn.commit()
\ No newline at end of file
+        with self.writer() as cursor:
+            cursor.execute('''
+                UPDATE games
+                SET last_played = CURRENT_TIMESTAMP,
+                    play_count = play_count + 1
+                WHERE id = ?
+            ''', (game_id,))
+    
+    def record_plays(self, plays):
+        """Apply queued plays in one transaction; plays maps game id -> (play count, last played timestamp)"""
+        with self.writer() as cursor:
+            cursor.executemany(
+                'UPDATE games SET play_count = play_count + ?, last_played = ? WHERE id = ?',
+                [(count, last_played, game_id) for game_id, (count, last_played) in plays.items()])
+    
+    def get_game(self, game_id, columns=GAME_COLUMNS):
+        """Return the game with game_id, or None"""
+        cursor = self.reader()
+        cursor.execute(f'SELECT {self.select_list(columns)} FROM games WHERE id = ?', (game_id,))
+        row = cursor.fetchone()
+        return self.to_games([row], columns)[0] if row else None
+    
+    def get_games(self, game_ids, chunk_size=500, columns=GAME_COLUMNS):
+        """Return the games with the given ids, in no particular order"""
+        game_ids = list(game_ids)
+        games = []
+        cursor = self.reader()
+        select = self.select_list(columns)
+        for start in range(0, len(game_ids), chunk_size):
+            chunk = game_ids[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'SELECT {select} FROM games WHERE id IN ({placeholders})', chunk)
+            games.extend(self.to_games(cursor.fetchall(), columns))
+        return games
+    
+    def update_thumbnail(self, game_id, thumbnail_path):
+        with self.writer() as cursor:
+            cursor.execute('UPDATE games SET thumbnail_path = ? WHERE id = ?', (thumbnail_path, game_id))
+    
+    def delete_game(self, game_id):
+        with self.writer() as cursor:
+            cursor.execute('DELETE FROM games WHERE id = ?', (game_id,))
+    
+    def find_game_by_swf_path(self, swf_path):
+        """Return the id of the game stored at swf_path, or None"""
+        cursor = self.reader()
+        cursor.execute('SELECT id FROM games WHERE swf_path = ?', (swf_path,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def find_game_by_hash(self, content_hash):
+        """Return the id of a game whose file has this SHA-256, or None"""
+        cursor = self.reader()
+        cursor.execute('SELECT id FROM games WHERE content_hash = ? LIMIT 1', (content_hash,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def count_games_with_swf_path(self, swf_path):
+        """Return how many games use the file at swf_path; stored files can be shared"""
+        cursor = self.reader()
+        cursor.execute('SELECT COUNT(*) FROM games WHERE swf_path = ?', (swf_path,))
+        return cursor.fetchone()[0]
+    
+    def get_games_without_hash(self, after_id=0, limit=500):
+        """Return up to limit (id, swf_path) rows past after_id whose content_hash hasn't been computed"""
+        cursor = self.reader()
+        cursor.execute(
+            'SELECT id, swf_path FROM games WHERE content_hash IS NULL AND id > ? ORDER BY id LIMIT ?',
+            (after_id, limit))
+        return cursor.fetchall()
+    
+    def set_content_hashes(self, hashes):
+        """Store content hashes given as (game id, content_hash) pairs"""
+        with self.writer() as cursor:
+            cursor.executemany(
+                'UPDATE games SET content_hash = ? WHERE id = ?',
+                [(content_hash, game_id) for game_id, content_hash in hashes])
+    
+    def count_games_without_cover(self):
+        """Return how many games use the default cover"""
+        cursor = self.reader()
+        cursor.execute('SELECT COUNT(*) FROM games WHERE thumbnail_path IS NULL')
+        return cursor.fetchone()[0]
+    
+    def get_games_without_cover(self, after_id=0, limit=500):
+        """Return up to limit (id, swf_path) rows past after_id of games using the default cover"""
+        cursor = self.reader()
+        cursor.execute(
+            'SELECT id, swf_path FROM games WHERE thumbnail_path IS NULL AND id > ? ORDER BY id LIMIT ?',
+            (after_id, limit))
+        return cursor.fetchall()
+    
+    def get_games_without_header(self, after_id=0, limit=500):
+        """Return up to limit (id, swf_path) rows past after_id whose SWF header hasn't been read"""
+        cursor = self.reader()
+        cursor.execute(
+            'SELECT id, swf_path FROM games WHERE swf_signature IS NULL AND id > ? ORDER BY id LIMIT ?',
+            (after_id, limit))
+        return cursor.fetchall()
+    
+    def set_swf_headers(self, headers):
+        """Store (game id, swf.SwfHeader) pairs; a header of None marks the file as not a readable SWF"""
+        assignments = ', '.join(f'{column} = ?' for column in HEADER_COLUMNS)
+        with self.writer() as cursor:
+            cursor.executemany(
+                f'UPDATE games SET {assignments} WHERE id = ?',
+                [(self.header_values(header) if header is not None else UNREADABLE_HEADER) + (game_id,)
+                 for game_id, header in headers])
+    
+    def update_game_file(self, game_id, swf_path, content_hash, header=None):
+        """Point a game at a new stored file, keeping its title and play history"""
+        assignments = ', '.join(f'{column} = ?' for column in HEADER_COLUMNS)
+        with self.writer() as cursor:
+            cursor.execute(
+                f'UPDATE games SET swf_path = ?, content_hash = ?, {assignments} WHERE id = ?',
+                (swf_path, content_hash) + self.header_values(header) + (game_id,))
+    
+    def count_compression_candidates(self):
+        """Return how many games have an uncompressed file that compression hasn't been tried on"""
+        cursor = self.reader()
+        cursor.execute('''
+            SELECT COUNT(*) FROM games
+            WHERE swf_signature = 'FWS' AND content_hash IS NOT NULL
+              AND content_hash NOT IN (SELECT content_hash FROM vault_compression)
+        ''')
+        return cursor.fetchone()[0]
+    
+    def get_compression_candidates(self, after_id=0, limit=500):
+        """Return up to limit (id, swf_path, content_hash) rows past after_id of games counted by count_compression_candidates"""
+        cursor = self.reader()
+        cursor.execute('''
+            SELECT id, swf_path, content_hash FROM games
+            WHERE swf_signature = 'FWS' AND content_hash IS NOT NULL AND id > ?
+              AND content_hash NOT IN (SELECT content_hash FROM vault_compression)
+            ORDER BY id LIMIT ?
+        ''', (after_id, limit))
+        return cursor.fetchall()
+    
+    def record_compression(self, content_hash, original_size, stored_size, swf_path=None, signature=None):
+        """Record that compression was tried on a stored file, and the new signature of every game using it"""
+        with self.writer() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO vault_compression (content_hash, original_size, stored_size) VALUES (?, ?, ?)',
+                (content_hash, original_size, stored_size))
+            if swf_path is not None and signature is not None:
+                cursor.execute('UPDATE games SET swf_signature = ? WHERE swf_path = ?', (signature, swf_path))
+    
+    def get_compression_totals(self):
+        """Return (stored files compressed, bytes saved)"""
+        cursor = self.reader()
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(original_size - stored_size), 0)
+            FROM vault_compression WHERE stored_size < original_size
+        ''')
+        return cursor.fetchone()
+    
+    def delete_all_games(self):
+        with self.writer() as cursor:
+            cursor.execute('DELETE FROM games')
+            # Manifest rows point at the deleted games; watched folders get re-imported on their next scan
+            cursor.execute('DELETE FROM watch_manifest')
+            cursor.execute('DELETE FROM vault_compression')
+            # games_stats_delete took the sessions and the totals with the games; the day history goes too
+            cursor.execute('DELETE FROM play_days')
+    
+    def get_watch_manifest(self, root):
+        """Return {path: (size, mtime_ns, game_id)} for every file recorded under the watched folder root"""
+        cursor = self.reader()
+        cursor.execute('SELECT path, size, mtime_ns, game_id FROM watch_manifest WHERE root = ?', (root,))
+        return {path: (size, mtime_ns, game_id) for path, size, mtime_ns, game_id in cursor.fetchall()}
+    
+    def update_watch_manifest(self, root, entries, removed_paths=()):
+        """Record (path, size, mtime_ns, game_id) entries under root and forget removed_paths, in one transaction"""
+        with self.writer() as cursor:
+            cursor.executemany(
+                'INSERT OR REPLACE INTO watch_manifest (path, root, size, mtime_ns, game_id) VALUES (?, ?, ?, ?, ?)',
+                [(path, root, size, mtime_ns, game_id) for path, size, mtime_ns, game_id in entries])
+            cursor.executemany('DELETE FROM watch_manifest WHERE path = ?', [(path,) for path in removed_paths])
+    
+    def delete_watch_manifest(self, root):
+        """Forget every file recorded under a folder that is no longer watched"""
+        with self.writer() as cursor:
+            cursor.execute('DELETE FROM watch_manifest WHERE root = ?', (root,))
+
+
+class PlayStatsQueue:
+    """Write-behind queue for play statistics
+    
+    record() only updates a dict, so launching a game never waits on
+    SQLite. A background thread waits delay seconds after the first
+    queued play, so plays in quick succession coalesce into one row
+    update per game, then writes the batch in a single transaction.
+    flush() writes whatever is pending right away; close() flushes and
+    stops the thread.
+    """
+    
+    def __init__(self, db, delay=1.0):
+        self.db = db
+        self.delay = delay
+        # game id -> (plays not yet written, time of the latest one)
+        self.pending = {}
+        self.lock = threading.Lock()
+        # Held for a whole swap + write, so flush() returns only after earlier batches are committed
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="PlayStatsQueue", daemon=True)
+        self.thread.start()
+    
+    def record(self, game_id):
+        # Same format as SQLite's CURRENT_TIMESTAMP
+        played_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        with self.lock:
+            count, _ = self.pending.get(game_id, (0, None))
+            self.pending[game_id] = (count + 1, played_at)
+        self.wakeup.set()
+    
+    def run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait()
+            self.stopping.wait(self.delay)
+            self.wakeup.clear()
+            self.flush()
+    
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                plays, self.pending = self.pending, {}
+            if not plays:
+                return
+            try:
+                self.db.record_plays(plays)
+            except sqlite3.Error as e:
+                print(f"Failed to save play statistics, will retry: {e}")
+                with self.lock:
+                    for game_id, (count, last_played) in plays.items():
+                        newer_count, newer_played = self.pending.get(game_id, (0, last_played))
+                        self.pending[game_id] = (count + newer_count, newer_played)
+    
+    def close(self):
+        self.stopping.set()
+        self.wakeup.set()
+        self.thread.join()
+        self.flush()
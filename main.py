@@ -1,13 +1,16 @@
 import sys
 import os
+import multiprocessing
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from ui.main_window import GameLibraryApp
-from PyQt6.QtWidgets import QApplication
-
 if __name__ == "__main__":
+    # Worker processes (cover extraction) re-run this file; keep the GUI imports out of them
+    multiprocessing.freeze_support()
+    from ui.main_window import GameLibraryApp
+    from PyQt6.QtWidgets import QApplication
+    
     app = QApplication(sys.argv)
     
     # Set application style for better look
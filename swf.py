@@ -0,0 +1,537 @@
+import io
+import os
+import lzma
+import zlib
+import struct
+from collections import namedtuple
+
+# First three bytes of a SWF file: uncompressed, zlib (Flash 6+) and LZMA (Flash 11+)
+SIGNATURES = (b'FWS', b'CWS', b'ZWS')
+
+# Compressed bytes read per step: small when only the header is wanted, larger when walking tags
+HEADER_READ_SIZE = 256
+TAG_READ_SIZE = 64 * 1024
+
+# Most bytes one decompress step may produce, so a highly compressed stream can't balloon in memory
+MAX_DECOMPRESS_STEP = 1024 * 1024
+
+# A SWF file header. length is the uncompressed file length the header
+# declares, width and height the stage size in pixels, frame_rate in frames
+# per second. Fields are in the order of database.HEADER_COLUMNS.
+SwfHeader = namedtuple('SwfHeader', ('signature', 'version', 'length', 'width', 'height', 'frame_rate', 'frame_count'))
+
+# Tag codes of the bitmap definitions (and the shared JPEG tables DefineBits uses)
+END = 0
+DEFINE_BITS = 6
+JPEG_TABLES = 8
+DEFINE_BITS_LOSSLESS = 20
+DEFINE_BITS_JPEG2 = 21
+DEFINE_BITS_JPEG3 = 35
+DEFINE_BITS_LOSSLESS2 = 36
+DEFINE_BITS_JPEG4 = 90
+BITMAP_TAGS = frozenset((DEFINE_BITS, JPEG_TABLES, DEFINE_BITS_LOSSLESS, DEFINE_BITS_JPEG2,
+                         DEFINE_BITS_JPEG3, DEFINE_BITS_LOSSLESS2, DEFINE_BITS_JPEG4))
+
+# Embedded bitmaps smaller than this on either side are icons or sprites, not covers
+MIN_COVER_SIDE = 64
+
+# SWF files before Flash 8 put an end-of-image and start-of-image marker pair
+# between JPEG tables and image data (or before the data); JPEG decoders stop at it
+JPEG_ERRONEOUS_HEADER = b'\xff\xd9\xff\xd8'
+
+# JPEG start-of-frame markers, which carry the image size
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# How uncompressed (FWS) files can be compressed: zlib gives CWS, lzma gives ZWS
+COMPRESSION_METHODS = ('zlib', 'lzma')
+
+# Oldest SWF version players accept each compressed signature for
+MIN_CWS_VERSION = 6
+MIN_ZWS_VERSION = 13
+
+# Compressed files that don't come out at least this much smaller are left uncompressed
+MIN_COMPRESSION_SAVING = 0.1
+
+# Bytes read per step while compressing
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+
+class SwfBody:
+    """Reads the bytes after a SWF file's 8-byte header, decompressing CWS and ZWS bodies as they are read
+    
+    Only as much of the file is read and decompressed as the reads ask
+    for, so stopping early never costs the rest of the file.
+    """
+    
+    def __init__(self, f, signature, read_size=TAG_READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buffer = bytearray()
+        if signature == 'FWS':
+            self.decompressor = None
+        elif signature == 'CWS':
+            self.decompressor = zlib.decompressobj()
+            self.pending = b''
+        else:
+            # ZWS: UI32 compressed length, then 5 bytes of LZMA properties and the raw stream.
+            # Rebuilt as an .lzma header with an unknown uncompressed size.
+            lzma_head = f.read(9)
+            if len(lzma_head) < 9:
+                raise ValueError("Truncated SWF header")
+            self.decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+            self.pending = lzma_head[4:9] + b'\xff' * 8
+    
+    def decompress_more(self):
+        """Add the next decompressed bytes to the buffer; returns False at the end of the stream"""
+        decompressor = self.decompressor
+        if decompressor.eof:
+            return False
+        if isinstance(decompressor, lzma.LZMADecompressor):
+            # LZMA keeps input it couldn't use yet; only feed it when it asks
+            data = self.pending + self.f.read(self.read_size) if decompressor.needs_input else b''
+            self.pending = b''
+            if not data and decompressor.needs_input:
+                return False
+        else:
+            # zlib hands back input it didn't get to because of max_length
+            data = decompressor.unconsumed_tail or self.pending + self.f.read(self.read_size)
+            self.pending = b''
+            if not data:
+                return False
+        try:
+            self.buffer += decompressor.decompress(data, MAX_DECOMPRESS_STEP)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise ValueError(f"Corrupt compressed SWF: {e}") from e
+        return True
+    
+    def read(self, size):
+        """Return the next size bytes, or fewer at the end of the file"""
+        if self.decompressor is None:
+            return self.f.read(size)
+        while len(self.buffer) < size and self.decompress_more():
+            pass
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+    
+    def skip(self, size):
+        """Move past size bytes without keeping them"""
+        if self.decompressor is None:
+            self.f.seek(size, os.SEEK_CUR)
+            return
+        while size > 0:
+            if not self.buffer and not self.decompress_more():
+                return
+            step = min(size, len(self.buffer))
+            del self.buffer[:step]
+            size -= step
+
+
+def open_swf(f, read_size=TAG_READ_SIZE):
+    """Read the fixed 8-byte header of an open SWF file; returns (signature, version, length, SwfBody)"""
+    head = f.read(8)
+    if len(head) < 8 or head[:3] not in SIGNATURES:
+        raise ValueError("Not a SWF file")
+    signature = head[:3].decode('ascii')
+    version = head[3]
+    length = struct.unpack('<I', head[4:8])[0]
+    return signature, version, length, SwfBody(f, signature, read_size)
+
+
+def read_movie_header(body):
+    """Read the stage RECT, frame rate and frame count at the start of body; returns (width, height, rate, count)"""
+    first = body.read(1)
+    if not first:
+        raise ValueError("Truncated SWF header")
+    nbits = first[0] >> 3
+    size = (5 + 4 * nbits + 7) // 8
+    rect = first + body.read(size - 1)
+    rest = body.read(4)
+    if len(rect) < size or len(rest) < 4:
+        raise ValueError("Truncated SWF header")
+    
+    bits = int.from_bytes(rect, 'big')
+    total = size * 8
+    values = []
+    for i in range(4):
+        shift = total - 5 - (i + 1) * nbits
+        value = (bits >> shift) & ((1 << nbits) - 1) if nbits else 0
+        # Signed field
+        if nbits and value & (1 << (nbits - 1)):
+            value -= 1 << nbits
+        values.append(value)
+    x_min, x_max, y_min, y_max = values
+    
+    # Frame rate is an 8.8 fixed point number
+    frame_rate, frame_count = struct.unpack('<HH', rest)
+    # Coordinates are in twips, 20 to the pixel
+    return round((x_max - x_min) / 20), round((y_max - y_min) / 20), frame_rate / 256, frame_count
+
+
+def read_swf_header(path):
+    """Parse the header of the SWF file at path into a SwfHeader
+    
+    Only the first few hundred bytes are read. For CWS and ZWS files the
+    compressed body is inflated step by step and only until the stage
+    RECT, frame rate and frame count are available, so the cost doesn't
+    depend on the size of the file. Raises ValueError if the file isn't a
+    SWF or is truncated, OSError if it can't be read.
+    """
+    with open(path, 'rb') as f:
+        return read_header_from(f)
+
+
+def parse_swf_header(data):
+    """Parse a SwfHeader from the first bytes of a SWF file, such as the first chunk of a stream
+    
+    A few hundred bytes are enough, compressed or not. Raises ValueError
+    if data isn't the start of a SWF or is too short to hold the header.
+    """
+    return read_header_from(io.BytesIO(data))
+
+
+def read_header_from(f):
+    signature, version, length, body = open_swf(f, HEADER_READ_SIZE)
+    width, height, frame_rate, frame_count = read_movie_header(body)
+    return SwfHeader(signature, version, length, width, height, frame_rate, frame_count)
+
+
+def iter_tags(path, codes):
+    """Yield (tag code, tag body) for the top-level tags of a SWF file whose code is in codes
+    
+    The file is read front to back in one pass; other tags are skipped
+    without being kept, so memory use doesn't grow with the file.
+    """
+    with open(path, 'rb') as f:
+        signature, version, length, body = open_swf(f)
+        read_movie_header(body)
+        while True:
+            head = body.read(2)
+            if len(head) < 2:
+                return
+            code_and_length = struct.unpack('<H', head)[0]
+            code, tag_length = code_and_length >> 6, code_and_length & 0x3F
+            if tag_length == 0x3F:
+                long_length = body.read(4)
+                if len(long_length) < 4:
+                    return
+                tag_length = struct.unpack('<I', long_length)[0]
+            if code == END:
+                return
+            if code in codes:
+                data = body.read(tag_length)
+                if len(data) < tag_length:
+                    return
+                yield code, data
+            else:
+                body.skip(tag_length)
+
+
+def jpeg_size(data):
+    """Return (width, height) from a JPEG stream's start-of-frame segment, or None"""
+    i = 0
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker in (0xD8, 0xD9, 0x01) or 0xD0 <= marker <= 0xD7:
+            # Markers without a length
+            i += 2
+        elif marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        elif marker == 0xDA:
+            # Start of scan: image data follows, and no frame header was seen
+            return None
+        else:
+            i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+
+def bitmap_image(code, data):
+    """Return the encoded image (JPEG, PNG or GIF) inside a DefineBitsJPEG2/3/4 tag"""
+    if code == DEFINE_BITS_JPEG2:
+        return data[2:]
+    # JPEG3 and JPEG4 follow the image with zlib-compressed alpha, which a cover doesn't need
+    alpha_offset = struct.unpack('<I', data[2:6])[0]
+    start = 6 if code == DEFINE_BITS_JPEG3 else 8
+    return data[start:start + alpha_offset]
+
+
+def image_size(image):
+    """Return (width, height) of an encoded JPEG, PNG or GIF image, or None"""
+    if image.startswith(b'\x89PNG') and len(image) >= 24:
+        return struct.unpack('>II', image[16:24])
+    if image.startswith(b'GIF8') and len(image) >= 10:
+        return struct.unpack('<HH', image[6:10])
+    return jpeg_size(image)
+
+
+def bitmap_size(code, data):
+    """Return (width, height) of the bitmap a definition tag holds, without decoding it"""
+    if code in (DEFINE_BITS_LOSSLESS, DEFINE_BITS_LOSSLESS2):
+        return struct.unpack('<HH', data[3:7])
+    if code == DEFINE_BITS:
+        return jpeg_size(data[2:])
+    return image_size(bitmap_image(code, data))
+
+
+def find_cover_bitmap(path):
+    """Return (tag code, tag body, JPEG tables) of the largest bitmap in a SWF file, or None
+    
+    Only the largest bitmap seen so far is kept while walking the tags.
+    Bitmaps smaller than MIN_COVER_SIDE on either side don't count.
+    """
+    best = None
+    best_area = 0
+    tables = b''
+    for code, data in iter_tags(path, BITMAP_TAGS):
+        if code == JPEG_TABLES:
+            tables = data
+            continue
+        try:
+            size = bitmap_size(code, data)
+        except struct.error:
+            # Truncated tag
+            continue
+        if size is None or min(size) < MIN_COVER_SIDE:
+            continue
+        area = size[0] * size[1]
+        if area > best_area:
+            best_area = area
+            best = (code, data, tables if code == DEFINE_BITS else b'')
+    return best
+
+
+def png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def encode_png(width, height, color_type, rows, palette=b''):
+    """Encode 8-bit rows (RGB for color type 2, palette indices for 3) as a PNG file"""
+    raw = b''.join(b'\x00' + bytes(row) for row in rows)
+    png = b'\x89PNG\r\n\x1a\n'
+    png += png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+    if palette:
+        png += png_chunk(b'PLTE', palette)
+    png += png_chunk(b'IDAT', zlib.compress(raw, 6))
+    return png + png_chunk(b'IEND', b'')
+
+
+def lossless_to_png(code, data):
+    """Convert a DefineBitsLossless(2) tag to a PNG file
+    
+    Alpha is dropped: DefineBitsLossless2 colours are premultiplied, so
+    their RGB is the image composited on black, which is fine for a cover.
+    """
+    # Character id, format, width and height, plus the colour table size for format 3
+    if len(data) < 7 or (data[2] == 3 and len(data) < 8):
+        raise ValueError("Truncated bitmap header")
+    bitmap_format = data[2]
+    width, height = struct.unpack('<HH', data[3:7])
+    alpha = code == DEFINE_BITS_LOSSLESS2
+    
+    if bitmap_format == 3:
+        # Colour-mapped: colour table, then one index per pixel with rows padded to 32 bits
+        entries = data[7] + 1
+        pixels = zlib.decompress(data[8:])
+        entry_size = 4 if alpha else 3
+        table = pixels[:entries * entry_size]
+        palette = bytearray(entries * 3)
+        for channel in range(3):
+            palette[channel::3] = table[channel::entry_size]
+        stride = (width + 3) & ~3
+        indices = pixels[entries * entry_size:]
+        if len(indices) < stride * height:
+            raise ValueError("Truncated bitmap data")
+        rows = [indices[y * stride:y * stride + width] for y in range(height)]
+        return encode_png(width, height, 3, rows, bytes(palette))
+    
+    pixels = zlib.decompress(data[7:])
+    bytes_per_pixel = 4 if bitmap_format == 5 else 2
+    if len(pixels) < ((width * bytes_per_pixel + 3) & ~3) * height:
+        raise ValueError("Truncated bitmap data")
+    rgb = bytearray(width * height * 3)
+    if bitmap_format == 5:
+        # 32 bits per pixel: reserved (or alpha), red, green, blue
+        for channel in range(3):
+            rgb[channel::3] = pixels[channel + 1:width * height * 4:4]
+    elif bitmap_format == 4 and not alpha:
+        # 15 bits per pixel, big-endian 0RRRRRGGGGGBBBBB, rows padded to 32 bits
+        stride = (width * 2 + 3) & ~3
+        out = 0
+        for y in range(height):
+            for x in range(y * stride, y * stride + width * 2, 2):
+                value = (pixels[x] << 8) | pixels[x + 1]
+                rgb[out] = (value >> 10 & 0x1F) << 3
+                rgb[out + 1] = (value >> 5 & 0x1F) << 3
+                rgb[out + 2] = (value & 0x1F) << 3
+                out += 3
+    else:
+        raise ValueError(f"Unknown lossless bitmap format {bitmap_format}")
+    row_size = width * 3
+    rows = [rgb[y * row_size:(y + 1) * row_size] for y in range(height)]
+    return encode_png(width, height, 2, rows)
+
+
+def encode_bitmap(code, data, tables=b''):
+    """Return (file extension, image file bytes) for a bitmap definition tag"""
+    if code in (DEFINE_BITS_LOSSLESS, DEFINE_BITS_LOSSLESS2):
+        return '.png', lossless_to_png(code, data)
+    if code == DEFINE_BITS:
+        image = tables + data[2:]
+    else:
+        image = bitmap_image(code, data)
+        if image.startswith(b'\x89PNG'):
+            return '.png', image
+        if image.startswith(b'GIF8'):
+            return '.gif', image
+    return '.jpg', image.replace(JPEG_ERRONEOUS_HEADER, b'')
+
+
+def extract_cover(swf_path, output_base):
+    """Save the largest bitmap embedded in swf_path as output_base plus an image extension
+    
+    Returns the saved path, or None if the file has no usable bitmap or
+    can't be parsed. Needs nothing but the standard library, so it can run
+    in a worker process.
+    """
+    try:
+        bitmap = find_cover_bitmap(swf_path)
+        if bitmap is None:
+            return None
+        ext, image = encode_bitmap(*bitmap)
+    except (OSError, ValueError, zlib.error, struct.error) as e:
+        print(f"Cannot extract a cover from {swf_path}: {e}")
+        return None
+    
+    path = output_base + ext
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(image)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Failed to save cover {path}: {e}")
+        remove_quietly(temp_path)
+        return None
+    return path
+
+
+def compressed_signature(version, compression):
+    """Return the signature an FWS file of this version gets from compression, or None if it can't be compressed"""
+    if compression == 'lzma' and version >= MIN_ZWS_VERSION:
+        return 'ZWS'
+    if compression in COMPRESSION_METHODS and version >= MIN_CWS_VERSION:
+        # LZMA falls back to zlib for players older than Flash 11
+        return 'CWS'
+    return None
+
+
+def compress_swf(source_path, target_path, compression):
+    """Write the FWS file at source_path to target_path as CWS (zlib) or ZWS (lzma)
+    
+    The file is compressed as a stream, a chunk at a time. Returns
+    (original size, compressed size, signature), or None with nothing
+    left at target_path if the file isn't an uncompressed SWF, its version
+    predates the compressed format, or compressing saves less than
+    MIN_COMPRESSION_SAVING.
+    """
+    with open(source_path, 'rb') as source:
+        head = source.read(8)
+        if len(head) < 8 or head[:3] != b'FWS':
+            return None
+        signature = compressed_signature(head[3], compression)
+        if signature is None:
+            return None
+        original_size = os.fstat(source.fileno()).st_size
+        chunks = iter(lambda: source.read(COMPRESS_CHUNK_SIZE), b'')
+        
+        try:
+            with open(target_path, 'wb') as target:
+                # Version and uncompressed length stay as they were
+                target.write(signature.encode('ascii') + head[3:8])
+                if signature == 'CWS':
+                    compressor = zlib.compressobj(9)
+                    for chunk in chunks:
+                        target.write(compressor.compress(chunk))
+                    target.write(compressor.flush())
+                else:
+                    write_zws_body(target, chunks)
+                compressed_size = target.tell()
+        except BaseException:
+            remove_quietly(target_path)
+            raise
+    
+    if compressed_size > original_size * (1 - MIN_COMPRESSION_SAVING):
+        remove_quietly(target_path)
+        return None
+    return original_size, compressed_size, signature
+
+
+def write_zws_body(target, chunks):
+    """Write chunks LZMA-compressed in the ZWS layout: UI32 compressed length, 5 property bytes, raw stream
+    
+    Python writes the .lzma format, which has the same properties
+    followed by an 8-byte uncompressed size; that size is dropped and the
+    length field filled in once the stream is done.
+    """
+    length_offset = target.tell()
+    target.write(b'\0' * 4)
+    compressor = lzma.LZMACompressor(format=lzma.FORMAT_ALONE)
+    header = b''
+    
+    def write(data):
+        nonlocal header
+        if len(header) < 13:
+            header += data
+            if len(header) < 13:
+                return
+            target.write(header[:5])
+            data = header[13:]
+        target.write(data)
+    
+    for chunk in chunks:
+        write(compressor.compress(chunk))
+    write(compressor.flush())
+    end = target.tell()
+    target.seek(length_offset)
+    target.write(struct.pack('<I', end - length_offset - 4 - 5))
+    target.seek(end)
+
+
+def compress_stored_swf(path, compression):
+    """Compress a stored FWS file in place; returns (original size, stored size, signature of the stored file)
+    
+    The new file is written next to the old one and renamed over it, so
+    the path, and anything open on the old file, keeps working. Files
+    with other hard links are left alone: a compressed copy would take
+    space the shared file doesn't. Needs only the standard library, so it
+    can run in a worker process.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        signature = f.read(3).decode('ascii', 'replace')
+    skipped = (stat.st_size, stat.st_size, signature)
+    if stat.st_nlink > 1:
+        return skipped
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    result = compress_swf(path, temp_path, compression)
+    if result is None:
+        return skipped
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        remove_quietly(temp_path)
+        raise
+    return result
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,180 @@
+import time
+import sqlite3
+
+import pytest
+
+from database import GameDatabase, PlayStatsQueue
+
+# Unix time an hour ago, and a day before that; both stay inside get_play_days' window
+NOW = int(time.time()) - 3600
+YESTERDAY = NOW - 86400
+
+
+def utc(timestamp):
+    """A Unix time in the format of SQLite's CURRENT_TIMESTAMP"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))
+
+
+def local_day(timestamp):
+    """The local calendar day play_days files a Unix time under"""
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = GameDatabase(str(tmp_path / 'games.db'))
+    yield db
+    db.close()
+
+
+def totals(db):
+    """library_stats as (games, plays, sessions, seconds)"""
+    return tuple(db.get_library_stats())
+
+
+def test_play_stats_rollups(db):
+    assert totals(db) == (0, 0, 0, 0)
+    assert db.get_play_days() == []
+    
+    first = db.add_game('First', '/games/first.swf')
+    assert totals(db) == (1, 0, 0, 0)
+    assert db.get_play_days() == []
+    
+    db.record_plays({first: (2, utc(NOW))})
+    assert totals(db) == (1, 2, 0, 0)
+    assert db.get_play_days() == [(local_day(NOW), 2, 0, 0)]
+    
+    db.add_play_session(first, NOW, NOW + 90, 90.0)
+    assert totals(db) == (1, 2, 1, 90)
+    assert db.get_play_days() == [(local_day(NOW), 2, 1, 90)]
+    assert db.get_game(first).play_seconds == 90
+    
+    # A second game on the same day adds to that day's row
+    second = db.add_game('Second', '/games/second.swf')
+    db.record_plays({second: (1, utc(NOW))})
+    db.add_play_session(second, NOW, NOW + 30, 30.0)
+    db.add_play_session(second, YESTERDAY, YESTERDAY + 10, 10.0)
+    assert totals(db) == (2, 3, 3, 130)
+    assert db.get_play_days() == [(local_day(NOW), 3, 2, 120), (local_day(YESTERDAY), 0, 1, 10)]
+    
+    # Totals describe the games in the library; the day history stays
+    db.delete_game(first)
+    assert totals(db) == (1, 1, 2, 40)
+    assert db.get_game_sessions(first) == []
+    assert db.get_play_days() == [(local_day(NOW), 3, 2, 120), (local_day(YESTERDAY), 0, 1, 10)]
+    
+    db.delete_all_games()
+    assert totals(db) == (0, 0, 0, 0)
+    assert db.get_play_days() == []
+    assert db.get_game_sessions(second) == []
+
+
+def test_updates_without_new_plays_leave_play_days_alone(db):
+    game_id = db.add_game('Game', '/games/game.swf')
+    db.record_plays({game_id: (1, utc(NOW))})
+    db.update_thumbnail(game_id, '/covers/game.png')
+    db.update_game_file(game_id, '/games/other.swf', 'abc')
+    assert totals(db) == (1, 1, 0, 0)
+    assert db.get_play_days() == [(local_day(NOW), 1, 0, 0)]
+
+
+def test_rollups_seeded_from_an_older_database(tmp_path):
+    path = str(tmp_path / 'games.db')
+    db = GameDatabase(path)
+    first = db.add_game('First', '/games/first.swf')
+    second = db.add_game('Second', '/games/second.swf')
+    db.record_plays({first: (3, utc(NOW)), second: (1, utc(NOW))})
+    db.add_play_session(second, NOW, NOW + 45, 45.0)
+    expected = totals(db)
+    assert expected == (2, 4, 1, 45)
+    # As if the library was last opened before the rollups existed
+    with db.writer() as cursor:
+        cursor.execute('DROP TABLE library_stats')
+    db.close()
+    
+    db = GameDatabase(path)
+    try:
+        assert totals(db) == expected
+    finally:
+        db.close()
+
+
+def test_pages_follow_title_order(db):
+    titles = ['beta', 'Alpha', 'alpha', 'Gamma', 'delta', 'Beta', 'epsilon']
+    ids = db.add_games([(title, f'/games/{i}.swf', None) for i, title in enumerate(titles)])
+    expected = sorted(zip(titles, ids), key=lambda game: (game[0].lower(), game[1]))
+    
+    pages = []
+    after = None
+    while True:
+        page = db.get_games_page(after, 3, ('id', 'title'))
+        pages.append(page)
+        if len(page) < 3:
+            break
+        after = (page[-1].title, page[-1].id)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [(game.title, game.id) for page in pages for game in page] == expected
+    assert [(game.title, game.id) for game in db.iter_games(('title',), page_size=2)] == expected
+
+
+def test_search_follows_inserts_updates_and_deletes(db):
+    game_id = db.add_game('Super Mario Flash', '/games/mario.swf')
+    db.add_game('Bloons Tower Defense', '/games/bloons.swf')
+    if db.fts_enabled:
+        # Every word is matched as a prefix
+        assert [game.id for game in db.search_games('mar fla', ('id',))] == [game_id]
+    assert [game.id for game in db.search_games('Mario', ('id',))] == [game_id]
+    
+    with db.writer() as cursor:
+        cursor.execute('UPDATE games SET title = ? WHERE id = ?', ('Sonic Flash', game_id))
+    assert db.search_games('Mario') == []
+    assert [game.id for game in db.search_games('Sonic', ('id',))] == [game_id]
+    
+    db.delete_game(game_id)
+    assert db.search_games('Sonic') == []
+    assert [game.title for game in db.search_games('tower', ('title',))] == ['Bloons Tower Defense']
+
+
+def test_play_stats_queue_coalesces_plays(db):
+    game_id = db.add_game('Game', '/games/game.swf')
+    batches = []
+    record_plays = db.record_plays
+    
+    def counting_record_plays(plays):
+        batches.append(dict(plays))
+        record_plays(plays)
+    db.record_plays = counting_record_plays
+    
+    # Long enough that only flush() writes
+    queue = PlayStatsQueue(db, delay=60)
+    try:
+        for _ in range(3):
+            queue.record(game_id)
+        assert db.get_game(game_id).play_count == 0
+        queue.flush()
+        assert len(batches) == 1 and batches[0][game_id][0] == 3
+        assert db.get_game(game_id).play_count == 3
+        assert db.get_game(game_id).last_played is not None
+        assert totals(db) == (1, 3, 0, 0)
+    finally:
+        queue.close()
+
+
+def test_play_stats_queue_keeps_plays_that_failed_to_save(db):
+    game_id = db.add_game('Game', '/games/game.swf')
+    record_plays = db.record_plays
+    
+    def locked(plays):
+        raise sqlite3.OperationalError('database is locked')
+    db.record_plays = locked
+    
+    queue = PlayStatsQueue(db, delay=60)
+    try:
+        queue.record(game_id)
+        queue.flush()
+        queue.record(game_id)
+        db.record_plays = record_plays
+        queue.flush()
+        assert db.get_game(game_id).play_count == 2
+    finally:
+        queue.close()
@@ -0,0 +1,265 @@
+import os
+import lzma
+import zlib
+import struct
+
+import pytest
+
+from swf import (SwfHeader, read_swf_header, parse_swf_header, iter_tags, lossless_to_png, extract_cover,
+                 compress_swf, compress_stored_swf, BITMAP_TAGS, DEFINE_BITS_LOSSLESS, DEFINE_BITS_JPEG2)
+
+# A tag no cover or header code looks at (DoAction), used as filler
+FILLER = 12
+
+
+def rect(width, height, nbits=16):
+    """Encode a stage RECT of width x height pixels"""
+    bits = format(nbits, '05b') + ''.join(format(value, f'0{nbits}b') for value in (0, width * 20, 0, height * 20))
+    bits += '0' * (-len(bits) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+
+def tag(code, data):
+    if len(data) < 0x3F:
+        return struct.pack('<H', code << 6 | len(data)) + data
+    return struct.pack('<HI', code << 6 | 0x3F, len(data)) + data
+
+
+def swf_bytes(signature, tags=(), version=10, width=550, height=400, frame_rate=24, frame_count=1):
+    """Build a SWF file, compressing the body the way signature says"""
+    body = rect(width, height) + struct.pack('<HH', frame_rate * 256, frame_count) + b''.join(tags) + tag(0, b'')
+    head = struct.pack('<I', 8 + len(body))
+    if signature == 'FWS':
+        return b'FWS' + bytes([version]) + head + body
+    if signature == 'CWS':
+        return b'CWS' + bytes([version]) + head + zlib.compress(body)
+    stream = lzma.compress(body, format=lzma.FORMAT_ALONE)
+    return b'ZWS' + bytes([version]) + head + struct.pack('<I', len(stream) - 13) + stream[:5] + stream[13:]
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def lossless_tag(width, height, color=(200, 30, 60)):
+    """A DefineBitsLossless tag of one colour, 32 bits per pixel"""
+    pixels = bytes((255,) + color) * (width * height)
+    return tag(DEFINE_BITS_LOSSLESS, struct.pack('<HBHH', 1, 5, width, height) + zlib.compress(pixels))
+
+
+def jpeg_tag(width, height):
+    """A DefineBitsJPEG2 tag whose image is just enough JPEG for its size to be read"""
+    image = b'\xff\xd8\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00\xff\xd9'
+    return tag(DEFINE_BITS_JPEG2, struct.pack('<H', 2) + b'\xff\xd9\xff\xd8' + image)
+
+
+def read_png(path):
+    """Return (width, height, color type, decompressed IDAT) of a PNG file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks = {}
+    i = 8
+    while i < len(data):
+        length = struct.unpack('>I', data[i:i + 4])[0]
+        chunks[data[i + 4:i + 8]] = data[i + 8:i + 8 + length]
+        i += 12 + length
+    width, height, depth, color_type = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    return width, height, color_type, zlib.decompress(chunks[b'IDAT'])
+
+
+@pytest.mark.parametrize('signature', ['FWS', 'CWS', 'ZWS'])
+def test_read_header(tmp_path, signature):
+    data = swf_bytes(signature, [tag(FILLER, os.urandom(5000))], version=14, width=640, height=480,
+                     frame_rate=30, frame_count=7)
+    path = write(tmp_path / 'game.swf', data)
+    length = struct.unpack('<I', data[4:8])[0]
+    expected = SwfHeader(signature, 14, length, 640, 480, 30.0, 7)
+    assert read_swf_header(path) == expected
+    # The first chunk of a stream is enough
+    assert parse_swf_header(data[:256]) == expected
+
+
+@pytest.mark.parametrize('signature', ['FWS', 'CWS', 'ZWS'])
+def test_iter_tags(tmp_path, signature):
+    wanted = tag(DEFINE_BITS_LOSSLESS, b'x' * 100)
+    path = write(tmp_path / 'game.swf', swf_bytes(signature, [tag(FILLER, b'skip' * 100), wanted, tag(FILLER, b'')]))
+    assert list(iter_tags(path, BITMAP_TAGS)) == [(DEFINE_BITS_LOSSLESS, b'x' * 100)]
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'FWS\x0a',
+    b'XYZ\x0a\x10\x00\x00\x00' + bytes(20),
+    # RECT claims 31-bit fields but the file ends after two bytes
+    b'FWS\x0a\x20\x00\x00\x00\xf8\x00',
+    # No frame rate or count after the RECT
+    b'FWS\x0a\x20\x00\x00\x00' + rect(100, 100),
+    # ZWS needs a compressed length and LZMA properties before its stream
+    b'ZWS\x0d\x20\x00\x00\x00\x10\x00',
+    b'CWS\x0a\x20\x00\x00\x00not zlib at all',
+])
+def test_malformed_header(tmp_path, data):
+    with pytest.raises(ValueError):
+        parse_swf_header(data)
+    with pytest.raises(ValueError):
+        read_swf_header(write(tmp_path / 'bad.swf', data))
+
+
+@pytest.mark.parametrize('signature', ['FWS', 'CWS'])
+def test_truncated_header_of_a_real_file(signature):
+    data = swf_bytes(signature, [tag(FILLER, os.urandom(500))])
+    with pytest.raises(ValueError):
+        parse_swf_header(data[:10])
+
+
+def test_tag_longer_than_the_file(tmp_path):
+    body = rect(100, 100) + struct.pack('<HH', 24 * 256, 1) + struct.pack('<HI', DEFINE_BITS_LOSSLESS << 6 | 0x3F, 10000)
+    path = write(tmp_path / 'short.swf', b'FWS\x0a' + struct.pack('<I', 8 + len(body)) + body + b'only a bit')
+    assert list(iter_tags(path, BITMAP_TAGS)) == []
+
+
+def test_cut_off_long_tag_length(tmp_path):
+    body = rect(100, 100) + struct.pack('<HH', 24 * 256, 1) + struct.pack('<H', DEFINE_BITS_LOSSLESS << 6 | 0x3F) + b'\x10'
+    path = write(tmp_path / 'short.swf', b'FWS\x0a' + struct.pack('<I', 8 + len(body)) + body)
+    assert list(iter_tags(path, BITMAP_TAGS)) == []
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'\x01\x00\x05',
+    # Colour-mapped, cut off before the colour table size
+    b'\x01\x00\x03\x40\x00\x40\x00',
+    # 32 bits per pixel, but only a few pixels' worth of data
+    struct.pack('<HBHH', 1, 5, 64, 64) + zlib.compress(b'\xff' * 40),
+    struct.pack('<HBHH', 1, 3, 64, 64) + b'\x00' + zlib.compress(b'\xff' * 40),
+    struct.pack('<HBHH', 1, 9, 64, 64) + zlib.compress(b'\xff' * 64 * 64 * 4),
+])
+def test_malformed_lossless(data):
+    with pytest.raises(ValueError):
+        lossless_to_png(DEFINE_BITS_LOSSLESS, data)
+
+
+def test_extract_lossless_cover(tmp_path):
+    path = write(tmp_path / 'game.swf', swf_bytes('CWS', [lossless_tag(80, 70), lossless_tag(100, 90, (1, 2, 3)),
+                                                          lossless_tag(20, 20)]))
+    cover = extract_cover(path, str(tmp_path / 'cover'))
+    assert cover == str(tmp_path / 'cover.png')
+    width, height, color_type, raw = read_png(cover)
+    assert (width, height, color_type) == (100, 90, 2)
+    # Each row is a filter byte and the pixels' RGB
+    assert raw[:7] == b'\x00' + bytes((1, 2, 3)) * 2
+
+
+def test_extract_colour_mapped_cover(tmp_path):
+    width, height = 65, 64
+    table = bytes((10, 20, 30, 40, 50, 60))
+    stride = (width + 3) & ~3
+    indices = bytes([1] * width + [0] * (stride - width)) * height
+    data = struct.pack('<HBHHB', 1, 3, width, height, 1) + zlib.compress(table + indices)
+    path = write(tmp_path / 'game.swf', swf_bytes('FWS', [tag(DEFINE_BITS_LOSSLESS, data)]))
+    width_read, height_read, color_type, raw = read_png(extract_cover(path, str(tmp_path / 'cover')))
+    assert (width_read, height_read, color_type) == (width, height, 3)
+    assert raw[:3] == b'\x00\x01\x01'
+
+
+def test_extract_jpeg_cover(tmp_path):
+    path = write(tmp_path / 'game.swf', swf_bytes('ZWS', [jpeg_tag(120, 100)], version=14))
+    cover = extract_cover(path, str(tmp_path / 'cover'))
+    assert cover == str(tmp_path / 'cover.jpg')
+    with open(cover, 'rb') as f:
+        # The pre-Flash 8 marker pair is dropped
+        assert f.read(4) == b'\xff\xd8\xff\xc0'
+
+
+def test_no_cover(tmp_path):
+    # Too small to be a cover
+    path = write(tmp_path / 'icons.swf', swf_bytes('CWS', [lossless_tag(32, 32)]))
+    assert extract_cover(path, str(tmp_path / 'cover')) is None
+    assert os.listdir(tmp_path) == ['icons.swf']
+
+
+def test_no_cover_from_short_lossless_tag(tmp_path):
+    # Big enough to be picked, too short to decode
+    short = tag(DEFINE_BITS_LOSSLESS, b'\x01\x00\x03\x40\x00\x40\x00')
+    path = write(tmp_path / 'short.swf', swf_bytes('FWS', [short]))
+    assert extract_cover(path, str(tmp_path / 'cover')) is None
+
+
+def test_no_cover_from_broken_file(tmp_path):
+    path = write(tmp_path / 'broken.swf', swf_bytes('CWS', [lossless_tag(80, 80)])[:40])
+    assert extract_cover(path, str(tmp_path / 'cover')) is None
+    assert extract_cover(str(tmp_path / 'missing.swf'), str(tmp_path / 'cover')) is None
+
+
+def compressible_swf(version):
+    return swf_bytes('FWS', [lossless_tag(80, 80), tag(FILLER, b'trace("hello");' * 5000)], version=version)
+
+
+@pytest.mark.parametrize('compression, version, signature', [
+    ('zlib', 10, 'CWS'),
+    ('lzma', 14, 'ZWS'),
+    # Players before Flash 11 can't read ZWS
+    ('lzma', 10, 'CWS'),
+])
+def test_compress_round_trip(tmp_path, compression, version, signature):
+    data = compressible_swf(version)
+    source = write(tmp_path / 'game.swf', data)
+    target = str(tmp_path / 'packed.swf')
+    original_size, compressed_size, result_signature = compress_swf(source, target, compression)
+    assert (original_size, compressed_size, result_signature) == (len(data), os.path.getsize(target), signature)
+    assert compressed_size < original_size
+    
+    header = read_swf_header(target)
+    assert header == read_swf_header(source)._replace(signature=signature)
+    assert list(iter_tags(target, BITMAP_TAGS)) == list(iter_tags(source, BITMAP_TAGS))
+    with open(target, 'rb') as f:
+        packed = f.read()
+    if signature == 'ZWS':
+        # Compressed length: everything after the length field and the LZMA properties
+        assert struct.unpack('<I', packed[8:12])[0] == len(packed) - 17
+        body = lzma.decompress(packed[12:17] + b'\xff' * 8 + packed[17:], format=lzma.FORMAT_ALONE)
+    else:
+        body = zlib.decompress(packed[8:])
+    assert body == data[8:]
+
+
+@pytest.mark.parametrize('data, compression', [
+    # Already compressed
+    (swf_bytes('CWS', [tag(FILLER, b'a' * 5000)]), 'zlib'),
+    # Older than the compressed formats
+    (swf_bytes('FWS', [tag(FILLER, b'a' * 5000)], version=5), 'zlib'),
+    # Doesn't shrink enough
+    (swf_bytes('FWS', [tag(FILLER, os.urandom(5000))]), 'lzma'),
+    (b'not a swf', 'zlib'),
+    (swf_bytes('FWS', [tag(FILLER, b'a' * 5000)]), 'off'),
+])
+def test_compress_refused(tmp_path, data, compression):
+    source = write(tmp_path / 'game.swf', data)
+    assert compress_swf(source, str(tmp_path / 'packed.swf'), compression) is None
+    assert os.listdir(tmp_path) == ['game.swf']
+
+
+def test_compress_stored_swf(tmp_path):
+    data = compressible_swf(14)
+    path = write(tmp_path / 'stored.swf', data)
+    original_size, stored_size, signature = compress_stored_swf(path, 'lzma')
+    assert (original_size, signature) == (len(data), 'ZWS')
+    assert stored_size == os.path.getsize(path) < original_size
+    assert read_swf_header(path).signature == 'ZWS'
+    assert os.listdir(tmp_path) == ['stored.swf']
+    
+    # Already compressed: left as it is
+    assert compress_stored_swf(path, 'zlib') == (stored_size, stored_size, 'ZWS')
+
+
+@pytest.mark.skipif(not hasattr(os, 'link'), reason="needs hard links")
+def test_compress_stored_swf_leaves_hard_links_alone(tmp_path):
+    data = compressible_swf(14)
+    path = write(tmp_path / 'stored.swf', data)
+    os.link(path, tmp_path / 'linked.swf')
+    assert compress_stored_swf(path, 'zlib') == (len(data), len(data), 'FWS')
+    with open(path, 'rb') as f:
+        assert f.read() == data
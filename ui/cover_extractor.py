@@ -0,0 +1,78 @@
+import os
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from swf import extract_cover
+from ui.pool_job import PoolJob, POOL_WORKERS
+
+# Files handed to the pool ahead of the results; parsing is quick, so keep the workers well fed
+QUEUE_AHEAD = POOL_WORKERS * 4
+
+
+def cover_base_path(covers_folder, game_id):
+    """Path, without extension, a game's extracted cover is saved at"""
+    return os.path.join(covers_folder, f"swf_cover_{game_id}")
+
+
+class CoverTaskSignals(QObject):
+    """Signals for CoverTask (QRunnable can't define its own)"""
+    
+    # Saved cover path, or None
+    finished = pyqtSignal(object)
+
+
+class CoverTask(QRunnable):
+    """Extracts one game's cover on a worker thread, when the user asks for it"""
+    
+    def __init__(self, swf_path, output_base, signals):
+        super().__init__()
+        self.swf_path = swf_path
+        self.output_base = output_base
+        self.signals = signals
+    
+    def run(self):
+        self.signals.finished.emit(extract_cover(self.swf_path, self.output_base))
+
+
+class CoverExtractor(PoolJob):
+    """Gives every game on the default cover the largest bitmap embedded in its SWF file
+    
+    Files are parsed by swf.extract_cover on worker processes, so tag
+    walking and decompression use every core and never hold the GUI's
+    interpreter lock. Games whose cover was changed while their file was
+    being parsed keep the new cover.
+    """
+    
+    function = staticmethod(extract_cover)
+    
+    def __init__(self, store, covers_folder, parent=None):
+        super().__init__(QUEUE_AHEAD, parent)
+        self.store = store
+        self.covers_folder = covers_folder
+    
+    def start(self):
+        os.makedirs(self.covers_folder, exist_ok=True)
+        self.total = self.store.db.count_games_without_cover()
+        self.found = 0
+        super().start()
+    
+    def fetch_rows(self, after_id, limit):
+        return self.store.db.get_games_without_cover(after_id, limit)
+    
+    def job_for(self, row):
+        game_id, swf_path = row
+        return game_id, (swf_path, cover_base_path(self.covers_folder, game_id))
+    
+    def handle_result(self, game_id, cover_path):
+        if not cover_path:
+            return
+        game = self.store.get(game_id)
+        if game and game.thumbnail_path is None:
+            self.store.set_thumbnail(game_id, cover_path)
+            self.found += 1
+        else:
+            # Removed, or given a cover some other way while the file was parsed
+            try:
+                os.remove(cover_path)
+            except OSError:
+                pass
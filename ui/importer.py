@@ -0,0 +1,838 @@
+import os
+import sys
+import mmap
+import time
+import errno
+import ctypes
+import hashlib
+import shutil
+import zipfile
+import tarfile
+import threading
+from collections import deque, Counter
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from swf import read_swf_header, parse_swf_header, compress_swf, remove_quietly, COMPRESSION_METHODS
+
+try:
+    # Optional: only needed for importing .7z archives
+    import py7zr
+except ImportError:
+    py7zr = None
+
+SEVEN_ZIP_AVAILABLE = py7zr is not None
+
+# Files copied at once; more mostly adds seeking on USB sticks and hard drives
+COPY_WORKERS = 4
+
+# Files found per signal from the scan, and how often copied games are added to the library
+SCAN_BATCH_SIZE = 200
+COMMIT_INTERVAL_MS = 500
+
+# Read size when a file can't be memory-mapped for hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# How an imported file gets into the games folder (config "import_strategy"):
+#   auto     - reflink, else hardlink, else copy
+#   reflink  - share the source's data blocks (btrfs, XFS, APFS); falls back to copy
+#   hardlink - second name for the source file, same filesystem only; falls back to copy
+#   move     - move the source file into the library; falls back to copy + delete
+#   copy     - always a full byte copy
+IMPORT_STRATEGIES = ('auto', 'reflink', 'hardlink', 'move', 'copy')
+
+# Linux ioctl that clones a file's extents (linux/fs.h)
+FICLONE = 0x40049409
+
+# Archives import_archives can read; .7z needs py7zr
+ARCHIVE_EXTENSIONS = ('.zip', '.7z', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Bytes read from an archive member per step
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes of an archive member kept to parse its SWF header from; enough even for CWS and ZWS
+HEADER_BUFFER_SIZE = 4096
+
+# Outcome of one ImportCopyTask, or of one archive member
+COPIED = 'copied'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+# An archive member that couldn't be read or isn't a SWF; unlike a failed copy there is no original file to fall back on
+UNREADABLE = 'unreadable'
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file
+    
+    The file is mapped into memory and hashed in one call, which lets
+    hashlib drop the GIL for the whole file; files that can't be mapped
+    are read in chunks instead.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        except (ValueError, OSError):
+            # Empty files and some network filesystems can't be mapped
+            f.seek(0)
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_header(path):
+    """Return the swf.SwfHeader of path, or None if it isn't a readable SWF"""
+    try:
+        return read_swf_header(path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read SWF header of {path}: {e}")
+        return None
+
+
+def content_path(folder, content_hash, ext):
+    """Where the file with content_hash lives in the content-addressed games folder"""
+    return os.path.join(folder, content_hash[:2], content_hash + ext.lower())
+
+
+def reflink_file(source_path, target_path):
+    """Make target_path a copy-on-write clone of source_path, or raise OSError if the filesystem can't"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return
+    if sys.platform == 'darwin':
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(source_path), os.fsencode(target_path), 0) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        return
+    raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+
+
+def place_file(source_path, target_path, strategy):
+    """Put source_path's content at target_path (which must not exist) and return the method used
+    
+    Methods the filesystem can't do fall back to the next one in auto
+    order and finally to a byte copy. Hardlinked files share the source's
+    inode, so later edits to the source show up in the library too.
+    """
+    if strategy in ('auto', 'reflink'):
+        try:
+            reflink_file(source_path, target_path)
+            return 'reflink'
+        except OSError:
+            try:
+                os.remove(target_path)
+            except OSError:
+                pass
+    
+    if strategy in ('auto', 'hardlink'):
+        try:
+            os.link(source_path, target_path)
+            return 'hardlink'
+        except OSError:
+            # Different filesystem, or one without hardlinks (FAT, some network shares)
+            pass
+    
+    if strategy == 'move':
+        try:
+            os.rename(source_path, target_path)
+            return 'move'
+        except OSError:
+            shutil.copyfile(source_path, target_path)
+            shutil.copystat(source_path, target_path)
+            os.remove(source_path)
+            return 'move'
+    
+    shutil.copyfile(source_path, target_path)
+    shutil.copystat(source_path, target_path)
+    return 'copy'
+
+
+def store_content(source_path, folder, content_hash=None, strategy='copy', compression=None):
+    """Store source_path in the content-addressed folder and return (stored path, SHA-256 hex digest, method)
+    
+    Files are named after their hash, so identical files are kept once:
+    if the content is already stored nothing is written and method is
+    'existing'. With compression ('zlib' or 'lzma') uncompressed SWF files
+    are stored compressed when that pays off, and method is the
+    compression used; the name stays the hash of the original. Otherwise
+    method is how place_file put it there. New files are placed under a
+    temporary name and renamed into place, so a half-copied file never
+    has a final name. With the move strategy the source is gone
+    afterwards, even if its content was stored already; if storing fails
+    it is put back where it was.
+    """
+    if content_hash is None:
+        content_hash = hash_file(source_path)
+    new_path = content_path(folder, content_hash, os.path.splitext(source_path)[1])
+    if os.path.exists(new_path):
+        if strategy == 'move' and not os.path.samefile(source_path, new_path):
+            # Same hash, same bytes: the stored file stands in for the moved one
+            os.remove(source_path)
+        return new_path, content_hash, 'existing'
+    
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    temp_path = f"{new_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        method = None
+        if compression in COMPRESSION_METHODS and compress_swf(source_path, temp_path, compression) is not None:
+            method = compression
+        if method is None:
+            method = place_file(source_path, temp_path, strategy)
+        os.replace(temp_path, new_path)
+    except BaseException:
+        if os.path.exists(source_path) or not os.path.exists(temp_path):
+            remove_quietly(temp_path)
+        else:
+            # Already moved: temp_path is the user's only copy
+            shutil.move(temp_path, source_path)
+        raise
+    if strategy == 'move' and method in COMPRESSION_METHODS:
+        # Only now that the compressed copy has its final name
+        try:
+            os.remove(source_path)
+        except OSError as e:
+            print(f"Stored {source_path} but could not remove the original: {e}")
+    return new_path, content_hash, method
+
+
+def walk_swf_files(folder, cancelled=None, folders=None, unreadable=None):
+    """Yield (path, os.stat_result) for every .swf file below folder, walking subfolders with os.scandir
+    
+    Symlinked folders are not followed, so links can't send the walk in
+    circles. Every folder visited is appended to folders and every folder
+    that couldn't be listed to unreadable, when those lists are given.
+    """
+    pending = [folder]
+    while pending:
+        if cancelled is not None and cancelled.is_set():
+            return
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                if folders is not None:
+                    folders.append(current)
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name.lower().endswith('.swf') and entry.is_file():
+                            yield entry.path, entry.stat()
+                    except OSError as e:
+                        print(f"Skipping {entry.path}: {e}")
+        except OSError as e:
+            print(f"Cannot read folder {current}: {e}")
+            if unreadable is not None:
+                unreadable.append(current)
+
+
+def scan_swf_files(folder, cancelled=None):
+    """Yield (path, size) for every .swf file below folder"""
+    for path, stat in walk_swf_files(folder, cancelled):
+        yield path, stat.st_size
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+class ImportCancelled(Exception):
+    """Raised inside an archive extraction to stop it when the import is cancelled"""
+
+
+class ArchiveMemberWriter:
+    """Stores one archive member in the content-addressed games folder as its bytes arrive
+    
+    Each chunk is hashed and written to a temporary file in the games
+    folder in the same pass, and the SWF header is parsed from the first
+    bytes as they go by, so the archive is never extracted anywhere else
+    and every byte is written once. finish() checks the hash against the
+    library and renames the file to its content address. Also has the
+    write/seek/flush/size methods py7zr expects of an extraction target;
+    on_complete is called once expected_size bytes have been written.
+    """
+    
+    def __init__(self, name, expected_size, folder, cancelled, on_complete=None):
+        self.name = name
+        self.expected_size = expected_size
+        self.folder = folder
+        self.cancelled = cancelled
+        self.on_complete = on_complete
+        self.digest = hashlib.sha256()
+        self.written = 0
+        self.completed = False
+        self.head = bytearray()
+        self.header = None
+        self.header_parsed = False
+        os.makedirs(folder, exist_ok=True)
+        self.temp_path = os.path.join(folder, f".{os.getpid()}-{threading.get_ident()}-{id(self)}.part")
+        self.file = open(self.temp_path, 'wb')
+    
+    def write(self, data):
+        if self.cancelled.is_set():
+            raise ImportCancelled()
+        self.digest.update(data)
+        self.file.write(data)
+        self.written += len(data)
+        if not self.header_parsed:
+            self.head += data[:HEADER_BUFFER_SIZE - len(self.head)]
+            if len(self.head) >= HEADER_BUFFER_SIZE:
+                self.parse_header()
+        self.check_complete()
+        return len(data)
+    
+    def check_complete(self):
+        if self.on_complete is not None and not self.completed and self.written >= self.expected_size:
+            self.completed = True
+            self.on_complete(self)
+    
+    def copy_from(self, stream):
+        for chunk in iter(lambda: stream.read(ARCHIVE_CHUNK_SIZE), b''):
+            self.write(chunk)
+    
+    def seek(self, offset, whence=0):
+        return self.written
+    
+    def flush(self):
+        pass
+    
+    def read(self, size=None):
+        return b''
+    
+    def size(self):
+        return self.written
+    
+    def close(self):
+        # Called by py7zr once the member has been written out
+        self.check_complete()
+    
+    def parse_header(self):
+        """Parse the SWF header from the buffered first bytes; the header stays None if they aren't a SWF"""
+        self.header_parsed = True
+        try:
+            self.header = parse_swf_header(bytes(self.head))
+        except ValueError as e:
+            print(f"Could not read SWF header of {self.name}: {e}")
+        self.head = None
+    
+    def finish(self, db, compression=None):
+        """Store the member under its content hash; returns (status, stored path, content hash, method, header)
+        
+        Members that aren't readable SWF files are reported as UNREADABLE and not stored.
+        """
+        self.file.close()
+        content_hash = self.digest.hexdigest()
+        if not self.header_parsed:
+            # Shorter than HEADER_BUFFER_SIZE
+            self.parse_header()
+        header = self.header
+        try:
+            if header is None:
+                # Empty, or not a SWF despite its name: a game made from it could never be played
+                return UNREADABLE, None, None, None, None
+            if db.find_game_by_hash(content_hash) is not None:
+                return DUPLICATE, None, content_hash, None, None
+            new_path = content_path(self.folder, content_hash, '.swf')
+            method = 'existing'
+            if not os.path.exists(new_path):
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                method = 'archive'
+                if compression in COMPRESSION_METHODS:
+                    packed_path = self.temp_path + '.packed'
+                    compressed = compress_swf(self.temp_path, packed_path, compression)
+                    if compressed is not None:
+                        os.replace(packed_path, self.temp_path)
+                        method = compression
+                        db.record_compression(content_hash, self.written, compressed[1])
+                        # Compression keeps every header field but the signature
+                        if header is not None:
+                            header = header._replace(signature=compressed[2])
+                os.replace(self.temp_path, new_path)
+            else:
+                # Already stored by an earlier import, possibly compressed since
+                header = read_header(new_path)
+            return COPIED, new_path, content_hash, method, header
+        finally:
+            # Gone already unless the member was a duplicate or storing it failed
+            remove_quietly(self.temp_path)
+    
+    def discard(self):
+        self.file.close()
+        remove_quietly(self.temp_path)
+
+
+class SevenZipWriterFactory:
+    """py7zr extraction factory handing out an ArchiveMemberWriter per member"""
+    
+    def __init__(self, task, archive_path, sizes):
+        self.task = task
+        self.archive_path = archive_path
+        self.sizes = sizes
+        self.writers = []
+    
+    def create(self, filename):
+        writer = ArchiveMemberWriter(
+            filename, self.sizes.get(filename, 0), self.task.destination_folder, self.task.cancelled,
+            lambda writer: self.task.store_member(self.archive_path, writer))
+        self.writers.append(writer)
+        return writer
+
+
+class ImportSignals(QObject):
+    """Signals for the import tasks (QRunnable can't define its own)"""
+    
+    # [(source path, size)] of files that still need importing
+    found = pyqtSignal(list)
+    # Number and total size of SWF members found in an archive; they are imported by the archive task itself
+    members_found = pyqtSignal(int, int)
+    scan_finished = pyqtSignal()
+    # A copy task has put its result in the importer's results queue
+    copy_done = pyqtSignal()
+
+
+class ImportScanTask(QRunnable):
+    """Walks the import folder and reports new SWF files in batches"""
+    
+    def __init__(self, folder, db, signals, cancelled):
+        super().__init__()
+        self.folder = folder
+        self.db = db
+        self.signals = signals
+        self.cancelled = cancelled
+    
+    def run(self):
+        batch = []
+        try:
+            for swf_path, size in scan_swf_files(self.folder, self.cancelled):
+                if self.db.find_game_by_swf_path(swf_path) is not None:
+                    continue
+                batch.append((swf_path, size))
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    self.signals.found.emit(batch)
+                    batch = []
+            if batch:
+                self.signals.found.emit(batch)
+        except Exception as e:
+            print(f"Folder scan failed: {e}")
+        self.signals.scan_finished.emit()
+
+
+class ImportCopyTask(QRunnable):
+    """Hashes one SWF file and stores it in the games folder unless the library already has it
+    
+    Always appends exactly one (status, source path, stored path, size,
+    content hash, method, header) entry to results; status is COPIED,
+    DUPLICATE, FAILED or SKIPPED (the import was cancelled before this
+    file was reached), method is what store_content reported and header
+    the file's swf.SwfHeader.
+    """
+    
+    def __init__(self, swf_path, size, destination_folder, strategy, compression, db, results, signals, cancelled):
+        super().__init__()
+        self.swf_path = swf_path
+        self.size = size
+        self.destination_folder = destination_folder
+        self.strategy = strategy
+        self.compression = compression
+        self.db = db
+        self.results = results
+        self.signals = signals
+        self.cancelled = cancelled
+    
+    def run(self):
+        status, new_path, content_hash, method, header = SKIPPED, None, None, None, None
+        if not self.cancelled.is_set():
+            try:
+                content_hash = hash_file(self.swf_path)
+                if self.db.find_game_by_hash(content_hash) is not None:
+                    status = DUPLICATE
+                else:
+                    new_path, content_hash, method = store_content(
+                        self.swf_path, self.destination_folder, content_hash, self.strategy, self.compression)
+                    if method in COMPRESSION_METHODS:
+                        self.db.record_compression(content_hash, self.size, os.path.getsize(new_path))
+                    # The header of the stored file, which may be compressed now; it was just written, so it's cached
+                    header = read_header(new_path)
+                    status = COPIED
+            except Exception as e:
+                print(f"Failed to copy {self.swf_path}: {e}")
+                status = FAILED
+        self.results.append((status, self.swf_path, new_path, self.size, content_hash, method, header))
+        self.signals.copy_done.emit()
+
+
+class ImportArchiveTask(QRunnable):
+    """Streams the SWF members of archives into the games folder, one member at a time
+    
+    Members are read straight out of the archive, hashed and written to
+    the games folder in one pass (see ArchiveMemberWriter), so nothing
+    but the SWF files themselves is ever extracted, and each of them only
+    once. tar archives, compressed or not, are read front to back as a
+    stream; .7z archives need py7zr. Appends one result per member to
+    results in the same form as ImportCopyTask, with the member shown as
+    a path inside the archive.
+    """
+    
+    def __init__(self, archive_paths, destination_folder, compression, db, results, signals, cancelled):
+        super().__init__()
+        self.archive_paths = archive_paths
+        self.destination_folder = destination_folder
+        self.compression = compression
+        self.db = db
+        self.results = results
+        self.signals = signals
+        self.cancelled = cancelled
+    
+    def run(self):
+        for archive_path in self.archive_paths:
+            if self.cancelled.is_set():
+                break
+            try:
+                lower = archive_path.lower()
+                if lower.endswith('.zip'):
+                    self.import_zip(archive_path)
+                elif lower.endswith('.7z'):
+                    self.import_7z(archive_path)
+                else:
+                    self.import_tar(archive_path)
+            except Exception as e:
+                print(f"Failed to read archive {archive_path}: {e}")
+        self.signals.scan_finished.emit()
+    
+    def report(self, status, source_path, size, new_path=None, content_hash=None, method=None, header=None):
+        self.results.append((status, source_path, new_path, size, content_hash, method, header))
+        self.signals.copy_done.emit()
+    
+    def store_member(self, archive_path, writer):
+        """Finish a fully written member and report it"""
+        source_path = os.path.join(archive_path, writer.name)
+        try:
+            status, new_path, content_hash, method, header = writer.finish(self.db, self.compression)
+        except Exception as e:
+            print(f"Failed to import {source_path}: {e}")
+            self.report(UNREADABLE, source_path, writer.written)
+            return
+        self.report(status, source_path, writer.written, new_path, content_hash, method, header)
+    
+    def import_stream(self, archive_path, name, size, stream):
+        writer = ArchiveMemberWriter(name, size, self.destination_folder, self.cancelled)
+        try:
+            writer.copy_from(stream)
+        except ImportCancelled:
+            writer.discard()
+            self.report(SKIPPED, os.path.join(archive_path, name), size)
+            return
+        except Exception as e:
+            writer.discard()
+            print(f"Failed to read {name} from {archive_path}: {e}")
+            self.report(UNREADABLE, os.path.join(archive_path, name), size)
+            return
+        self.store_member(archive_path, writer)
+    
+    def import_zip(self, archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            members = [info for info in archive.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith('.swf')]
+            self.signals.members_found.emit(len(members), sum(info.file_size for info in members))
+            for info in members:
+                if self.cancelled.is_set():
+                    self.report(SKIPPED, os.path.join(archive_path, info.filename), info.file_size)
+                    continue
+                try:
+                    with archive.open(info) as stream:
+                        self.import_stream(archive_path, info.filename, info.file_size, stream)
+                except (OSError, RuntimeError, NotImplementedError, zipfile.BadZipFile) as e:
+                    # Encrypted, or compressed with a method zipfile doesn't have
+                    print(f"Failed to read {info.filename} from {archive_path}: {e}")
+                    self.report(UNREADABLE, os.path.join(archive_path, info.filename), info.file_size)
+    
+    def import_tar(self, archive_path):
+        # Stream mode: no seeking, so compressed tars are decompressed exactly once
+        with tarfile.open(archive_path, 'r|*') as archive:
+            for member in archive:
+                if self.cancelled.is_set():
+                    return
+                if not member.isfile() or not member.name.lower().endswith('.swf'):
+                    continue
+                self.signals.members_found.emit(1, member.size)
+                self.import_stream(archive_path, member.name, member.size, archive.extractfile(member))
+    
+    def import_7z(self, archive_path):
+        if py7zr is None:
+            raise OSError(errno.ENOPKG, "Importing .7z archives needs the py7zr package")
+        with py7zr.SevenZipFile(archive_path, 'r') as archive:
+            sizes = {info.filename: info.uncompressed for info in archive.list()
+                     if not info.is_directory and info.filename.lower().endswith('.swf')}
+            self.signals.members_found.emit(len(sizes), sum(sizes.values()))
+            factory = SevenZipWriterFactory(self, archive_path, sizes)
+            try:
+                # py7zr decompresses each solid block once and writes every member through the factory
+                archive.extract(targets=list(sizes), factory=factory)
+            except ImportCancelled:
+                pass
+            finally:
+                for writer in factory.writers:
+                    if not writer.completed:
+                        # Empty members never see a write; others were cut short by a cancel or an error
+                        if writer.written == writer.expected_size and not self.cancelled.is_set():
+                            self.store_member(archive_path, writer)
+                        else:
+                            writer.discard()
+                            self.report(SKIPPED, os.path.join(archive_path, writer.name), writer.expected_size)
+                        writer.completed = True
+                # Members py7zr never got to
+                created = {writer.name for writer in factory.writers}
+                for name, size in sizes.items():
+                    if name not in created:
+                        self.report(SKIPPED, os.path.join(archive_path, name), size)
+
+
+class HashBackfillTask(QRunnable):
+    """Computes content hashes for games added before files were content-addressed
+    
+    Only the hash column is filled in; the files stay where they are.
+    """
+    
+    def __init__(self, db, stopping):
+        super().__init__()
+        self.db = db
+        self.stopping = stopping
+    
+    def run(self):
+        after_id = 0
+        hashed = 0
+        while not self.stopping.is_set():
+            rows = self.db.get_games_without_hash(after_id)
+            if not rows:
+                break
+            hashes = []
+            for game_id, swf_path in rows:
+                if self.stopping.is_set():
+                    break
+                try:
+                    hashes.append((game_id, hash_file(swf_path)))
+                except OSError:
+                    # Missing files stay unhashed
+                    pass
+            if hashes:
+                self.db.set_content_hashes(hashes)
+                hashed += len(hashes)
+            after_id = rows[-1][0]
+        if hashed:
+            print(f"Computed content hashes for {hashed} games")
+
+
+class HeaderBackfillTask(QRunnable):
+    """Reads the SWF header of games added before headers were recorded at import"""
+    
+    def __init__(self, db, stopping):
+        super().__init__()
+        self.db = db
+        self.stopping = stopping
+    
+    def run(self):
+        after_id = 0
+        parsed = 0
+        while not self.stopping.is_set():
+            rows = self.db.get_games_without_header(after_id)
+            if not rows:
+                break
+            headers = []
+            for game_id, swf_path in rows:
+                if self.stopping.is_set():
+                    break
+                if os.path.exists(swf_path):
+                    # Unreadable files are recorded too, so they aren't retried on every start
+                    headers.append((game_id, read_header(swf_path)))
+            if headers:
+                self.db.set_swf_headers(headers)
+                parsed += len(headers)
+            after_id = rows[-1][0]
+        if parsed:
+            print(f"Read SWF headers of {parsed} games")
+
+
+class FolderImporter(QObject):
+    """Imports every SWF file below a folder without blocking the GUI
+    
+    A scan task walks the folder tree while copies run on a small thread
+    pool. Copied games are added to the store in batches as they land, so
+    cancelling keeps everything that was already copied and the library
+    and games folder stay in step. Files whose content is already in the
+    library, or earlier in the same import, are skipped. Files that can't
+    be copied are added from their original location, as a single-game
+    import does. Archives are imported the same way, except that their
+    members are streamed out by the scan task itself (ImportArchiveTask).
+    """
+    
+    progress = pyqtSignal()
+    finished = pyqtSignal()
+    
+    def __init__(self, store, destination_folder, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.destination_folder = destination_folder
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(COPY_WORKERS)
+        self.scan_pool = QThreadPool(self)
+        self.scan_pool.setMaxThreadCount(1)
+        # Filled by copy tasks on worker threads, drained on the GUI thread
+        self.results = deque()
+        self.signals = ImportSignals(self)
+        self.signals.found.connect(self.on_found)
+        self.signals.members_found.connect(self.on_members_found)
+        self.signals.scan_finished.connect(self.on_scan_finished)
+        self.signals.copy_done.connect(self.collect)
+        self.commit_timer = QTimer(self)
+        self.commit_timer.setInterval(COMMIT_INTERVAL_MS)
+        self.commit_timer.timeout.connect(self.commit)
+        self.cancelled = threading.Event()
+        # Set on shutdown to stop background work such as the hash backfill
+        self.stopping = threading.Event()
+        self.running = False
+        self.archives = False
+    
+    def backfill_hashes(self):
+        """Hash, in the background, the files of games that have no content hash yet"""
+        self.pool.start(HashBackfillTask(self.store.db, self.stopping))
+    
+    def backfill_headers(self):
+        """Read, in the background, the SWF headers of games that don't have them yet"""
+        self.pool.start(HeaderBackfillTask(self.store.db, self.stopping))
+    
+    def start(self, folder, strategy='copy', compression=None):
+        self.reset(strategy, compression)
+        self.scan_pool.start(ImportScanTask(folder, self.store.db, self.signals, self.cancelled))
+    
+    def start_archives(self, archive_paths, compression=None):
+        """Import the SWF files inside archives; members are streamed out one by one on the scan thread"""
+        self.reset('copy', compression)
+        self.archives = True
+        self.scan_pool.start(ImportArchiveTask(
+            archive_paths, self.destination_folder, compression, self.store.db,
+            self.results, self.signals, self.cancelled))
+    
+    def reset(self, strategy, compression):
+        self.cancelled.clear()
+        self.strategy = strategy
+        self.compression = compression
+        self.archives = False
+        self.running = True
+        self.scanning = True
+        self.files_total = 0
+        self.files_done = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.imported = 0
+        self.failed = 0
+        self.unreadable = 0
+        self.duplicates = 0
+        self.seen_hashes = set()
+        # method -> number of files stored that way
+        self.methods = Counter()
+        self.copied_games = []
+        self.started_at = time.monotonic()
+        self.commit_timer.start()
+    
+    def cancel(self):
+        """Stop scanning and skip copies that haven't started; copies in progress still finish"""
+        if self.running:
+            self.cancelled.set()
+    
+    def on_found(self, files):
+        for swf_path, size in files:
+            self.files_total += 1
+            self.bytes_total += size
+            self.pool.start(ImportCopyTask(
+                swf_path, size, self.destination_folder, self.strategy, self.compression,
+                self.store.db, self.results, self.signals, self.cancelled))
+        self.progress.emit()
+    
+    def on_members_found(self, count, size):
+        self.files_total += count
+        self.bytes_total += size
+        self.progress.emit()
+    
+    def on_scan_finished(self):
+        self.scanning = False
+        self.check_finished()
+        self.progress.emit()
+    
+    def collect(self):
+        """Take the finished copies off the results queue"""
+        if not self.results:
+            return
+        while self.results:
+            status, swf_path, new_path, size, content_hash, method, header = self.results.popleft()
+            if status == SKIPPED:
+                # Not reached before a cancel: no longer part of the import
+                self.files_total -= 1
+                self.bytes_total -= size
+                continue
+            self.files_done += 1
+            self.bytes_done += size
+            if status == DUPLICATE or content_hash is not None and content_hash in self.seen_hashes:
+                self.duplicates += 1
+                continue
+            if status == UNREADABLE:
+                # Only existed inside the archive, so there is nothing to add it from
+                self.unreadable += 1
+                continue
+            if status == FAILED:
+                self.failed += 1
+                new_path = swf_path
+            if content_hash is not None:
+                self.seen_hashes.add(content_hash)
+            if method:
+                self.methods[method] += 1
+            title = os.path.splitext(os.path.basename(swf_path))[0]
+            # Add with default thumbnail (None means use default style)
+            self.copied_games.append((title, new_path, None, content_hash, header))
+        self.check_finished()
+        self.progress.emit()
+    
+    def commit(self):
+        """Add the games copied since the last commit to the library in one transaction"""
+        if not self.copied_games:
+            return
+        games, self.copied_games = self.copied_games, []
+        self.imported += len(self.store.add_games(games))
+    
+    def check_finished(self):
+        if not self.running or self.scanning or self.files_done < self.files_total:
+            return
+        self.commit_timer.stop()
+        self.commit()
+        self.running = False
+        self.finished.emit()
+    
+    def throughput(self):
+        """Bytes copied per second so far"""
+        elapsed = time.monotonic() - self.started_at
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+    
+    def eta(self):
+        """Estimated seconds left, or None while the folder is still being scanned"""
+        rate = self.throughput()
+        if self.scanning or rate <= 0:
+            return None
+        return (self.bytes_total - self.bytes_done) / rate
+    
+    def shutdown(self):
+        """Cancel and wait for the workers, keeping every file already copied in the library"""
+        self.stopping.set()
+        # The window is going away; don't report progress or completion to it
+        self.blockSignals(True)
+        self.cancel()
+        self.scan_pool.waitForDone()
+        self.pool.waitForDone()
+        if not self.running:
+            return
+        self.collect()
+        self.commit_timer.stop()
+        self.commit()
+        self.running = False
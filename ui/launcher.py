@@ -0,0 +1,145 @@
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QProcess, pyqtSignal
+
+# Games that may run at once unless the config says otherwise
+DEFAULT_MAX_RUNNING = 3
+
+# Finished sessions and launch latencies kept in memory
+HISTORY_SIZE = 100
+
+# How long a player gets to close on its own when the library shuts down
+TERMINATE_TIMEOUT_MS = 3000
+
+
+class PlaySession:
+    """One run of the Flash player, from the click to the player exiting"""
+    
+    def __init__(self, game_id, title, swf_path, player_path, requested_at):
+        # game_id is None for a test launch, which isn't a play of any game
+        self.game_id = game_id
+        self.title = title
+        self.swf_path = swf_path
+        self.player_path = player_path
+        # time.monotonic() when the launch was asked for
+        self.requested_at = requested_at
+        self.process = None
+        # Wall-clock times (time.time()) the player started and exited
+        self.started_at = None
+        self.exited_at = None
+        self.exit_code = None
+        self.crashed = False
+        # Seconds from the click to the player process running
+        self.launch_latency = None
+        self.started_monotonic = None
+        self.exited_monotonic = None
+    
+    def duration(self):
+        """Seconds the player ran, so far if it still is"""
+        if self.started_monotonic is None:
+            return 0.0
+        end = self.exited_monotonic if self.exited_monotonic is not None else time.monotonic()
+        return end - self.started_monotonic
+
+
+class GameLauncher(QObject):
+    """Starts Flash players with QProcess and keeps track of them until they exit
+    
+    Unlike a fire-and-forget Popen, every player is a session: its start
+    and exit times and exit code are recorded, finished processes are
+    reaped by Qt, and no more than max_running players run at once, so a
+    burst of double-clicks starts one game, not ten. A game that is
+    already running isn't started a second time. Each session also
+    measures the time from the click to the player process running.
+    """
+    
+    # PlaySession
+    session_started = pyqtSignal(object)
+    session_finished = pyqtSignal(object)
+    # PlaySession and error message; the player never ran
+    launch_failed = pyqtSignal(object, str)
+    
+    def __init__(self, max_running=DEFAULT_MAX_RUNNING, parent=None):
+        super().__init__(parent)
+        self.max_running = max_running
+        # Sessions whose player is starting or running
+        self.sessions = []
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.latencies = deque(maxlen=HISTORY_SIZE)
+    
+    def refusal(self, game_id):
+        """Why a launch of game_id would be refused right now, or None if it wouldn't"""
+        if game_id is not None and any(session.game_id == game_id for session in self.sessions):
+            return "This game is already running."
+        if len(self.sessions) >= self.max_running:
+            return f"{len(self.sessions)} games are already running (the limit is {self.max_running})."
+        return None
+    
+    def launch(self, game_id, title, swf_path, player_path, requested_at=None):
+        """Start the player on swf_path; returns the new PlaySession, or None if refusal() refuses it"""
+        if self.refusal(game_id) is not None:
+            return None
+        session = PlaySession(game_id, title, swf_path, player_path,
+                              requested_at if requested_at is not None else time.monotonic())
+        process = QProcess(self)
+        # The player's output is of no use here; don't let it fill a pipe
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedChannels)
+        process.started.connect(lambda: self.on_started(session))
+        process.finished.connect(lambda exit_code, exit_status: self.on_finished(session, exit_code, exit_status))
+        process.errorOccurred.connect(lambda error: self.on_error(session, error))
+        session.process = process
+        self.sessions.append(session)
+        process.start(player_path, [swf_path])
+        return session
+    
+    def on_started(self, session):
+        session.started_at = time.time()
+        session.started_monotonic = time.monotonic()
+        session.launch_latency = session.started_monotonic - session.requested_at
+        self.latencies.append(session.launch_latency)
+        print(f"Started {session.title} in {session.launch_latency * 1000:.0f} ms")
+        self.session_started.emit(session)
+    
+    def on_error(self, session, error):
+        # Crashes and other errors of a running player also end in finished()
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        message = session.process.errorString()
+        print(f"Failed to start {session.player_path}: {message}")
+        self.end_session(session)
+        self.launch_failed.emit(session, message)
+    
+    def on_finished(self, session, exit_code, exit_status):
+        session.exited_at = time.time()
+        session.exited_monotonic = time.monotonic()
+        session.exit_code = exit_code
+        session.crashed = exit_status == QProcess.ExitStatus.CrashExit
+        self.end_session(session)
+        self.history.append(session)
+        outcome = "crashed" if session.crashed else f"exited with code {exit_code}"
+        print(f"{session.title} {outcome} after {session.duration():.0f} s")
+        self.session_finished.emit(session)
+    
+    def end_session(self, session):
+        if session in self.sessions:
+            self.sessions.remove(session)
+        session.process.deleteLater()
+    
+    def running_count(self):
+        return len(self.sessions)
+    
+    def latency_stats(self):
+        """Return (launches measured, average and worst click-to-start latency in seconds), or None"""
+        if not self.latencies:
+            return None
+        return len(self.latencies), sum(self.latencies) / len(self.latencies), max(self.latencies)
+    
+    def shutdown(self):
+        """Close every running player, recording how its session ended"""
+        for session in list(self.sessions):
+            process = session.process
+            process.terminate()
+            if not process.waitForFinished(TERMINATE_TIMEOUT_MS):
+                process.kill()
+                process.waitForFinished(TERMINATE_TIMEOUT_MS)
@@ -0,0 +1,203 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from database import CARD_COLUMNS, PlayStatsQueue
+
+# Games read from the database per page
+PAGE_SIZE = 120
+
+# Bulk inserts touching more loaded rows than this reset views instead of inserting row by row
+BULK_RESET_THRESHOLD = 200
+
+# SQLite's NOCASE collation only folds ASCII letters
+NOCASE_TABLE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def sort_key(game):
+    """Python equivalent of ORDER BY title COLLATE NOCASE, id"""
+    return (game.title.translate(NOCASE_TABLE), game.id)
+
+
+class LibraryStore(QObject):
+    """In-memory copy of the games table that emits per-game change signals
+    
+    Rows are paged in from the database in case-insensitive (title, id)
+    order (see sort_key), so the first
+    screenful is available without reading the whole table. Every mutation
+    goes through the store, which writes to the database and then tells
+    listeners exactly which game was inserted, removed or changed, so views
+    never have to re-query.
+    Games are database.Game records holding only CARD_COLUMNS.
+    """
+    
+    games_reset = pyqtSignal()
+    games_loaded = pyqtSignal(list)
+    game_inserted = pyqtSignal(tuple)
+    # Every batch of new games, including ones past the paged-in range that game_inserted skips
+    games_added = pyqtSignal(list)
+    game_removed = pyqtSignal(int)
+    game_changed = pyqtSignal(tuple)
+    
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.games_by_id = {}
+        self.total_count = 0
+        self.total_plays = 0
+        self.total_sessions = 0
+        self.total_seconds = 0.0
+        # Last row paged in; None before the first page
+        self.loaded_until = None
+        self.fully_loaded = False
+        self.play_stats = PlayStatsQueue(db)
+    
+    def load(self):
+        """(Re)load the totals and the first page of rows from the database"""
+        self.play_stats.flush()
+        self.total_count, self.total_plays, self.total_sessions, self.total_seconds = self.db.get_library_stats()
+        self.games_by_id = {}
+        self.loaded_until = None
+        self.fully_loaded = False
+        self.fetch_page(PAGE_SIZE)
+        self.games_reset.emit()
+    
+    def load_more(self, count=PAGE_SIZE):
+        """Page in the next count rows; emits games_loaded with the new rows"""
+        if self.fully_loaded:
+            return
+        games = self.fetch_page(count)
+        if games:
+            self.games_loaded.emit(games)
+    
+    def load_all(self):
+        """Page in every remaining row (needed before searching or walking all games)"""
+        while not self.fully_loaded:
+            self.load_more(max(self.total_count - len(self.games_by_id), PAGE_SIZE))
+    
+    def fetch_page(self, count):
+        # Rows read now must include plays still waiting in the queue
+        self.play_stats.flush()
+        after = (self.loaded_until.title, self.loaded_until.id) if self.loaded_until else None
+        games = self.db.get_games_page(after, count, CARD_COLUMNS)
+        for game in games:
+            self.games_by_id[game.id] = game
+        if games:
+            self.loaded_until = games[-1]
+        if len(games) < count:
+            self.fully_loaded = True
+        return games
+    
+    def is_loaded_range(self, game):
+        """Whether game sorts inside the rows paged in so far"""
+        return self.fully_loaded or (self.loaded_until is not None and sort_key(game) < sort_key(self.loaded_until))
+    
+    def __len__(self):
+        return len(self.games_by_id)
+    
+    def games(self):
+        return list(self.games_by_id.values())
+    
+    def get(self, game_id):
+        """Return a game by id, reading it from the database if it isn't paged in yet"""
+        game = self.games_by_id.get(game_id)
+        if game is None:
+            self.play_stats.flush()
+            game = self.db.get_game(game_id, CARD_COLUMNS)
+        return game
+    
+    def add_game(self, title, swf_path, thumbnail_path=None, content_hash=None, header=None):
+        """Insert a game and return its id"""
+        game_id = self.db.add_game(title, swf_path, thumbnail_path, content_hash, header)
+        game = self.db.get_game(game_id, CARD_COLUMNS)
+        self.total_count += 1
+        # Games past the paged-in range show up with a later page
+        if self.is_loaded_range(game):
+            self.games_by_id[game_id] = game
+            self.game_inserted.emit(game)
+        self.games_added.emit([game])
+        return game_id
+    
+    def add_games(self, games):
+        """Insert (title, swf_path, thumbnail_path[, content_hash[, header]]) tuples in one transaction and return their ids
+        
+        Views get one game_inserted per game for small batches and a single
+        games_reset for large ones.
+        """
+        game_ids = self.db.add_games(games)
+        if not game_ids:
+            return game_ids
+        added = self.db.get_games(game_ids, columns=CARD_COLUMNS)
+        self.total_count += len(added)
+        visible = [game for game in added if self.is_loaded_range(game)]
+        for game in visible:
+            self.games_by_id[game.id] = game
+        if len(visible) > BULK_RESET_THRESHOLD:
+            self.games_reset.emit()
+        else:
+            for game in visible:
+                self.game_inserted.emit(game)
+        self.games_added.emit(added)
+        return game_ids
+    
+    def remove_game(self, game_id):
+        game = self.games_by_id.pop(game_id, None) or self.db.get_game(game_id, CARD_COLUMNS)
+        self.db.delete_game(game_id)
+        if game:
+            self.total_count -= 1
+            self.total_plays -= game.play_count
+            # Time played isn't a card column; the database already took it off its totals
+            _, _, self.total_sessions, self.total_seconds = self.db.get_library_stats()
+            self.game_removed.emit(game_id)
+    
+    def set_thumbnail(self, game_id, thumbnail_path):
+        self.db.update_thumbnail(game_id, thumbnail_path)
+        game = self.get(game_id)
+        if game:
+            self.replace_game(game._replace(thumbnail_path=thumbnail_path))
+    
+    def set_game_file(self, game_id, swf_path, content_hash, header=None):
+        """Point a game at a new stored file, keeping its title and play history"""
+        self.db.update_game_file(game_id, swf_path, content_hash, header)
+        game = self.get(game_id)
+        if game:
+            self.replace_game(game._replace(swf_path=swf_path))
+    
+    def record_play(self, game_id):
+        """Count a play in memory now and queue the database write"""
+        game = self.get(game_id)
+        if game:
+            self.play_stats.record(game_id)
+            self.total_plays += 1
+            self.replace_game(game._replace(play_count=game.play_count + 1))
+    
+    def record_session(self, session):
+        """Save a finished ui.launcher.PlaySession to the play history"""
+        if self.get(session.game_id) is None:
+            # Removed from the library while it was running
+            return
+        duration = session.duration()
+        self.db.add_play_session(
+            session.game_id, session.started_at, session.exited_at, duration, session.exit_code, session.crashed)
+        self.total_sessions += 1
+        self.total_seconds += duration
+    
+    def clear(self):
+        self.play_stats.flush()
+        self.db.delete_all_games()
+        self.games_by_id = {}
+        self.total_count = 0
+        self.total_plays = 0
+        self.total_sessions = 0
+        self.total_seconds = 0.0
+        self.loaded_until = None
+        self.fully_loaded = True
+        self.games_reset.emit()
+    
+    def close(self):
+        """Write any queued play statistics; call before the database is closed"""
+        self.play_stats.close()
+    
+    def replace_game(self, game):
+        # Games that aren't paged in (e.g. search hits further down) are only signalled
+        if game.id in self.games_by_id:
+            self.games_by_id[game.id] = game
+        self.game_changed.emit(game)
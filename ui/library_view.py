@@ -0,0 +1,373 @@
+import bisect
+
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+
+from ui.library_store import sort_key
+
+# Card geometry (matches the old QWidget cards)
+CARD_WIDTH = 220
+CARD_HEIGHT = 280
+THUMB_WIDTH = 180
+THUMB_HEIGHT = 140
+
+# Custom model roles
+GameIdRole = Qt.ItemDataRole.UserRole.value + 1
+SwfPathRole = Qt.ItemDataRole.UserRole.value + 2
+ThumbnailPathRole = Qt.ItemDataRole.UserRole.value + 3
+PlayCountRole = Qt.ItemDataRole.UserRole.value + 4
+
+
+class GameRowsModel(QAbstractListModel):
+    """Base list model exposing game row tuples through the card roles"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.games = []
+    
+    def game_at(self, row):
+        return self.games[row]
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.games)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.games):
+            return None
+        
+        game = self.games[index.row()]
+        
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return game.title
+        if role == GameIdRole:
+            return game.id
+        if role == SwfPathRole:
+            return game.swf_path
+        if role == ThumbnailPathRole:
+            return game.thumbnail_path
+        if role == PlayCountRole:
+            return game.play_count
+        return None
+
+
+class GameListModel(GameRowsModel):
+    """List model mirroring a LibraryStore, kept in the store's sort_key order
+    
+    Store signals are applied as single-row inserts, removals and
+    dataChanged notifications, so one added game costs the same no matter
+    how large the library is.
+    """
+    
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.sort_keys = []
+        self.keys_by_id = {}
+        store.games_reset.connect(self.on_games_reset)
+        store.games_loaded.connect(self.on_games_loaded)
+        store.game_inserted.connect(self.on_game_inserted)
+        store.game_removed.connect(self.on_game_removed)
+        store.game_changed.connect(self.on_game_changed)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.store.fully_loaded
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self.store.load_more()
+    
+    def row_of(self, game_id):
+        """Return the row of a game, or -1 if it is not in the model"""
+        key = self.keys_by_id.get(game_id)
+        if key is None:
+            return -1
+        return bisect.bisect_left(self.sort_keys, key)
+    
+    def on_games_reset(self):
+        self.beginResetModel()
+        self.games = sorted(self.store.games(), key=sort_key)
+        self.sort_keys = [sort_key(game) for game in self.games]
+        self.keys_by_id = {game.id: key for game, key in zip(self.games, self.sort_keys)}
+        self.endResetModel()
+    
+    def on_games_loaded(self, games):
+        """Append a page of rows; pages always sort after the rows already loaded"""
+        first = len(self.games)
+        self.beginInsertRows(QModelIndex(), first, first + len(games) - 1)
+        keys = [sort_key(game) for game in games]
+        self.games.extend(games)
+        self.sort_keys.extend(keys)
+        self.keys_by_id.update((game.id, key) for game, key in zip(games, keys))
+        self.endInsertRows()
+    
+    def on_game_inserted(self, game):
+        key = sort_key(game)
+        row = bisect.bisect_left(self.sort_keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.games.insert(row, game)
+        self.sort_keys.insert(row, key)
+        self.keys_by_id[game.id] = key
+        self.endInsertRows()
+    
+    def on_game_removed(self, game_id):
+        row = self.row_of(game_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.games[row]
+        del self.sort_keys[row]
+        del self.keys_by_id[game_id]
+        self.endRemoveRows()
+    
+    def on_game_changed(self, game):
+        row = self.row_of(game.id)
+        if row < 0:
+            return
+        if self.sort_keys[row] != sort_key(game):
+            # Sort position changed, move it as a remove + insert
+            self.on_game_removed(game.id)
+            self.on_game_inserted(game)
+            return
+        self.games[row] = game
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+
+class SearchResultsModel(GameRowsModel):
+    """Fixed list of search hits, in the order the search returned them
+    
+    Plays, cover changes and removals from the LibraryStore are applied to
+    the hits so the cards stay current until the next search.
+    """
+    
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.rows_by_id = {}
+        store.game_removed.connect(self.on_game_removed)
+        store.game_changed.connect(self.on_game_changed)
+    
+    def set_results(self, games):
+        self.beginResetModel()
+        self.games = list(games)
+        self.rows_by_id = {game.id: row for row, game in enumerate(self.games)}
+        self.endResetModel()
+    
+    def on_game_removed(self, game_id):
+        row = self.rows_by_id.get(game_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.games[row]
+        self.rows_by_id = {game.id: row for row, game in enumerate(self.games)}
+        self.endRemoveRows()
+    
+    def on_game_changed(self, game):
+        row = self.rows_by_id.get(game.id)
+        if row is None:
+            return
+        self.games[row] = game
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+
+class GameCardDelegate(QStyledItemDelegate):
+    """Paints a game card (cover, title, play count, Play/Menu buttons) for each visible index"""
+    
+    play_clicked = pyqtSignal(QModelIndex)
+    menu_clicked = pyqtSignal(QModelIndex)
+    thumbnail_clicked = pyqtSignal(QModelIndex)
+    
+    def __init__(self, thumbnail_provider, parent=None):
+        super().__init__(parent)
+        # Callable (index) -> QPixmap, called only for painted cards
+        self.thumbnail_provider = thumbnail_provider
+        self.hover_row = -1
+        self.hover_part = None
+        self.title_font = QFont()
+        self.title_font.setBold(True)
+        self.title_font.setPixelSize(14)
+        self.info_font = QFont()
+        self.info_font.setPixelSize(12)
+        self.button_font = QFont()
+        self.button_font.setBold(True)
+        self.button_font.setPixelSize(12)
+        self.menu_font = QFont()
+        self.menu_font.setPixelSize(11)
+    
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+    
+    def card_rects(self, rect):
+        """Return the sub-rectangles of a card centered horizontally in rect"""
+        left = rect.left() + max(0, (rect.width() - CARD_WIDTH) // 2)
+        top = rect.top() + max(0, (rect.height() - CARD_HEIGHT) // 2)
+        return {
+            "card": QRect(left, top, CARD_WIDTH, CARD_HEIGHT),
+            "thumbnail": QRect(left + (CARD_WIDTH - THUMB_WIDTH) // 2, top + 10, THUMB_WIDTH, THUMB_HEIGHT),
+            "title": QRect(left + 10, top + 158, CARD_WIDTH - 20, 40),
+            "info": QRect(left + 10, top + 202, CARD_WIDTH - 20, 20),
+            "play": QRect(left + 10, top + 234, 124, 34),
+            "menu": QRect(left + 140, top + 234, 70, 34),
+        }
+    
+    def hit_test(self, rect, pos):
+        """Return which part of the card is under pos ("play", "menu", "thumbnail" or None)"""
+        rects = self.card_rects(rect)
+        for part in ("play", "menu", "thumbnail"):
+            if rects[part].contains(pos):
+                return part
+        return None
+    
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        rects = self.card_rects(option.rect)
+        card_rect = rects["card"]
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        row_hovered = index.row() == self.hover_row
+        
+        # Card background
+        painter.setPen(QPen(QColor("#4CAF50") if hovered else QColor("#444"), 1))
+        painter.setBrush(QColor("#333") if hovered else QColor("#2d2d2d"))
+        painter.drawRoundedRect(QRectF(card_rect).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+        
+        # Cover, centered in its slot
+        pixmap = self.thumbnail_provider(index)
+        if pixmap is not None and not pixmap.isNull():
+            thumb_rect = rects["thumbnail"]
+            x = thumb_rect.left() + (thumb_rect.width() - pixmap.width()) // 2
+            y = thumb_rect.top() + (thumb_rect.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+        
+        # Title
+        painter.setPen(QColor("white"))
+        painter.setFont(self.title_font)
+        painter.drawText(rects["title"], Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, index.data())
+        
+        # Play count
+        painter.setPen(QColor("#aaa"))
+        painter.setFont(self.info_font)
+        painter.drawText(rects["info"], Qt.AlignmentFlag.AlignCenter, f"▶️ Plays: {index.data(PlayCountRole)}")
+        
+        # Buttons
+        painter.setPen(Qt.PenStyle.NoPen)
+        play_hover = row_hovered and self.hover_part == "play"
+        painter.setBrush(QColor("#66bb6a") if play_hover else QColor("#4CAF50"))
+        painter.drawRoundedRect(QRectF(rects["play"]), 4, 4)
+        menu_hover = row_hovered and self.hover_part == "menu"
+        painter.setBrush(QColor("#777") if menu_hover else QColor("#666"))
+        painter.drawRoundedRect(QRectF(rects["menu"]), 4, 4)
+        
+        painter.setPen(QColor("white"))
+        painter.setFont(self.button_font)
+        painter.drawText(rects["play"], Qt.AlignmentFlag.AlignCenter, "🎮 Play")
+        painter.setFont(self.menu_font)
+        painter.drawText(rects["menu"], Qt.AlignmentFlag.AlignCenter, "⋯ Menu")
+        
+        painter.restore()
+    
+    def editorEvent(self, event, model, option, index):
+        """Turn clicks on the painted hit areas into signals"""
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            part = self.hit_test(option.rect, event.position().toPoint())
+            if part == "play":
+                self.play_clicked.emit(index)
+                return True
+            if part == "menu":
+                self.menu_clicked.emit(index)
+                return True
+            if part == "thumbnail":
+                self.thumbnail_clicked.emit(index)
+                return True
+        
+        return super().editorEvent(event, model, option, index)
+
+
+class LibraryView(QListView):
+    """Wrapping list view that lays cards out in a grid and only paints visible ones
+    
+    The column count follows the viewport width, with leftover space spread
+    evenly between columns. When the scroll position gets within a couple
+    of screens of the bottom the model is asked for its next page of rows.
+    """
+    
+    # Minimum space between cards
+    CARD_SPACING = 20
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # List mode with wrapping gives a grid whose layout is cheap and batched
+        self.setViewMode(QListView.ViewMode.ListMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(200)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(CARD_WIDTH + self.CARD_SPACING, CARD_HEIGHT + self.CARD_SPACING))
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(20)
+        self.verticalScrollBar().valueChanged.connect(self.fetch_if_near_bottom)
+        self.setMouseTracking(True)
+        self.setStyleSheet("""
+            QListView {
+                background-color: #1e1e1e;
+                border: none;
+            }
+        """)
+    
+    def resizeEvent(self, event):
+        self.update_grid_size()
+        super().resizeEvent(event)
+    
+    def update_grid_size(self):
+        """Fit as many columns as the viewport allows and share out the spare width"""
+        cell_width = CARD_WIDTH + self.CARD_SPACING
+        # QListView wraps a row that exactly fills the viewport, so leave a pixel spare
+        available = self.viewport().width() - 1
+        columns = max(1, available // cell_width)
+        grid = QSize(max(cell_width, available // columns), CARD_HEIGHT + self.CARD_SPACING)
+        if grid != self.gridSize():
+            self.setGridSize(grid)
+    
+    def fetch_if_near_bottom(self, value=None):
+        """Page in more rows before the user actually reaches the end"""
+        model = self.model()
+        if model is None or not model.canFetchMore(QModelIndex()):
+            return
+        scroll_bar = self.verticalScrollBar()
+        if scroll_bar.maximum() - scroll_bar.value() < 2 * self.viewport().height():
+            model.fetchMore(QModelIndex())
+    
+    def mouseMoveEvent(self, event):
+        """Track which button is under the mouse so the delegate can paint hover states"""
+        delegate = self.itemDelegate()
+        if isinstance(delegate, GameCardDelegate):
+            pos = event.position().toPoint()
+            index = self.indexAt(pos)
+            row = index.row() if index.isValid() else -1
+            part = delegate.hit_test(self.visualRect(index), pos) if index.isValid() else None
+            if row != delegate.hover_row or part != delegate.hover_part:
+                delegate.hover_row = row
+                delegate.hover_part = part
+                if part:
+                    self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+                else:
+                    self.viewport().unsetCursor()
+                self.viewport().update()
+        super().mouseMoveEvent(event)
+    
+    def leaveEvent(self, event):
+        delegate = self.itemDelegate()
+        if isinstance(delegate, GameCardDelegate):
+            delegate.hover_row = -1
+            delegate.hover_part = None
+            self.viewport().update()
+        super().leaveEvent(event)
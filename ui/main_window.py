@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import subprocess
 import platform
 import shutil
 import webbrowser
@@ -13,52 +12,25 @@ from PyQt6.QtGui import *
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineSettings, QWebEnginePage
 
-# Database class
-class GameDatabase:
-    def __init__(self):
-        import sqlite3
-        os.makedirs("data", exist_ok=True)
-        self.conn = sqlite3.connect("data/games.db", check_same_thread=False)
-        self.create_tables()
-    
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS games (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                swf_path TEXT NOT NULL,
-                thumbnail_path TEXT,
-                added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_played TIMESTAMP,
-                play_count INTEGER DEFAULT 0
-            )
-        ''')
-        self.conn.commit()
-    
-    def add_game(self, title, swf_path, thumbnail_path):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO games (title, swf_path, thumbnail_path)
-            VALUES (?, ?, ?)
-        ''', (title, swf_path, thumbnail_path))
-        self.conn.commit()
-        return cursor.lastrowid
-    
-    def get_all_games(self):
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM games ORDER BY title')
-        return cursor.fetchall()
-    
-    def update_play_stats(self, game_id):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE games 
-            SET last_played = CURRENT_TIMESTAMP, 
-                play_count = play_count + 1 
-            WHERE id = ?
-        ''', (game_id,))
-        self.conn.commit()
+# Make the project root importable when this file is run directly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import GameDatabase, CARD_COLUMNS
+from ui.library_store import LibraryStore
+from ui.thumbnails import ThumbnailCache, CoverLoader, PixmapCache
+from ui.importer import FolderImporter, store_content, scan_swf_files, read_header, IMPORT_STRATEGIES, ARCHIVE_EXTENSIONS, SEVEN_ZIP_AVAILABLE
+from ui.watcher import FolderWatcher
+from ui.cover_extractor import CoverExtractor, CoverTask, CoverTaskSignals, cover_base_path
+from ui.vault_optimizer import VaultOptimizer
+from ui.launcher import GameLauncher, DEFAULT_MAX_RUNNING
+from ui.prefetcher import GamePrefetcher, DEFAULT_BUDGET_MB
+from swf import COMPRESSION_METHODS
+from ui.library_view import GameListModel, SearchResultsModel, GameCardDelegate, LibraryView, GameIdRole, SwfPathRole, ThumbnailPathRole
+
+# Days of activity and games per list shown on the stats tab
+PLAY_STATS_DAYS = 14
+PLAY_STATS_TOP = 10
+
 
 class CustomWebEnginePage(QWebEnginePage):
     def __init__(self, parent=None):
@@ -355,8 +327,9 @@ class GameLibraryApp(QMainWindow):
         # Set window icon
         self.set_window_icon()
         
-        # Initialize database
+        # Initialize database and the in-memory library store
         self.db = GameDatabase()
+        self.store = LibraryStore(self.db, self)
         
         # Load configuration
         self.config = self.load_config()
@@ -364,20 +337,67 @@ class GameLibraryApp(QMainWindow):
         # Create hidden games folder structure
         self.hidden_games_folder = "data/.games"
         self.hidden_covers_folder = "data/.covers"
+        self.hidden_thumbs_folder = "data/.thumbs"
         
-        for folder in [self.hidden_games_folder, self.hidden_covers_folder]:
+        for folder in [self.hidden_games_folder, self.hidden_covers_folder, self.hidden_thumbs_folder]:
             os.makedirs(folder, exist_ok=True)
         
         # Set hidden attribute on Windows
         if platform.system() == "Windows":
             try:
                 import ctypes
-                for folder in [self.hidden_games_folder, self.hidden_covers_folder]:
+                for folder in [self.hidden_games_folder, self.hidden_covers_folder, self.hidden_thumbs_folder]:
                     if os.path.exists(folder):
                         ctypes.windll.kernel32.SetFileAttributesW(folder, 2)
             except:
                 pass
         
+        # Pre-scaled cover thumbnails, persisted between runs
+        self.thumb_disk_cache = ThumbnailCache(self.hidden_thumbs_folder)
+        
+        # Covers are decoded on worker threads; cards show a placeholder until then
+        self.cover_loader = CoverLoader(self.thumb_disk_cache, 180, 140, self)
+        self.cover_loader.cover_loaded.connect(self.on_cover_loaded)
+        self.placeholder_pixmap = self.create_placeholder_thumbnail()
+        
+        # Folder imports scan and copy on worker threads
+        self.folder_importer = FolderImporter(self.store, self.hidden_games_folder, self)
+        self.folder_importer.progress.connect(self.update_import_progress)
+        self.folder_importer.finished.connect(self.on_import_finished)
+        self.import_progress = None
+        self.folder_importer.backfill_hashes()
+        self.folder_importer.backfill_headers()
+        
+        # Watched folders are synced in the background as files come and go
+        self.folder_watcher = FolderWatcher(self.store, self.hidden_games_folder, self)
+        self.folder_watcher.synced.connect(self.on_watch_folder_synced)
+        self.folder_watcher.cover_released.connect(self.delete_cover_file)
+        
+        # Covers pulled out of the game files themselves, on worker processes
+        self.cover_extractor = CoverExtractor(self.store, self.hidden_covers_folder, self)
+        self.cover_extractor.progress.connect(self.update_cover_extraction_progress)
+        self.cover_extractor.finished.connect(self.on_cover_extraction_finished)
+        self.cover_extraction_progress = None
+        
+        # Recompresses uncompressed game files already in the hidden folder, on worker processes
+        self.vault_optimizer = VaultOptimizer(self.db, self.hidden_games_folder, self)
+        self.vault_optimizer.progress.connect(self.update_vault_optimize_progress)
+        self.vault_optimizer.finished.connect(self.on_vault_optimize_finished)
+        self.vault_optimize_progress = None
+        
+        # Flash players run as tracked sessions, a limited number at a time
+        self.launcher = GameLauncher(self.config.get("max_running_games", DEFAULT_MAX_RUNNING), self)
+        self.launcher.session_started.connect(self.on_session_started)
+        self.launcher.launch_failed.connect(self.on_launch_failed)
+        self.launcher.session_finished.connect(self.on_session_finished)
+        
+        # Warms the likeliest games' files in the page cache while the library is idle
+        self.prefetcher = GamePrefetcher(
+            self.db, self.config.get("prefetch_budget_mb", DEFAULT_BUDGET_MB) * 1024 * 1024, self)
+        
+        # Shared in-memory covers, bounded by the configured budget
+        self.thumbnail_cache = PixmapCache(self.config.get("thumbnail_cache_mb", 64) * 1024 * 1024)
+        
         # Default cover path - in covers folder
         self.default_cover_path = os.path.join(self.hidden_covers_folder, "default_cover.png")
         
@@ -386,6 +406,8 @@ class GameLibraryApp(QMainWindow):
         
         self.setup_ui()
         self.load_games()
+        self.folder_watcher.set_roots(
+            self.config["watch_folders"], self.config.get("import_strategy", "auto"), self.vault_compression())
     
     def set_window_icon(self):
         """Set the window icon using the FlashVault logo"""
@@ -478,6 +500,12 @@ class GameLibraryApp(QMainWindow):
             ],
             "use_inapp_browser": True,
             "thumbnail_style": "name_background",  # Options: "name_background", "default_picture"
+            "thumbnail_cache_mb": 64,
+            "import_strategy": "auto",  # Options: see IMPORT_STRATEGIES in ui/importer.py
+            "vault_compression": "off",  # Options: "off", "zlib", "lzma"
+            "max_running_games": 3,
+            "prefetch_budget_mb": 256,  # 0 turns prefetching off
+            "watch_folders": [],
             "recent_searches": []
         }
         
@@ -534,9 +562,15 @@ class GameLibraryApp(QMainWindow):
         self.setup_library_tab()
         self.tabs.addTab(self.library_tab, "📚 Game Library")
         
+        self.stats_tab = QWidget()
+        self.setup_stats_tab()
+        self.tabs.addTab(self.stats_tab, "📈 Play Stats")
+        
         self.settings_tab = QWidget()
         self.setup_settings_tab()
         self.tabs.addTab(self.settings_tab, "⚙️ Settings")
+        self.tabs.currentChanged.connect(self.update_cache_stats_label)
+        self.tabs.currentChanged.connect(self.refresh_play_stats)
         
         main_layout.addWidget(self.tabs)
         
@@ -558,7 +592,7 @@ class GameLibraryApp(QMainWindow):
             QPushButton:pressed {
                 background-color: #333;
             }
-            QLineEdit, QComboBox {
+            QLineEdit, QComboBox, QSpinBox {
                 background-color: #2d2d2d;
                 color: white;
                 border: 1px solid #444;
@@ -682,24 +716,131 @@ class GameLibraryApp(QMainWindow):
         
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search games...")
-        self.search_input.textChanged.connect(self.filter_games)
+        
+        # Debounce search so fast typing only filters once it pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(120)
+        self.search_timer.timeout.connect(self.filter_games)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.textChanged.connect(self.prefetcher.note_activity)
         
         toolbar_layout.addWidget(add_btn)
         toolbar_layout.addWidget(refresh_btn)
         toolbar_layout.addWidget(self.search_input)
         toolbar_layout.addStretch()
         
-        self.games_scroll = QScrollArea()
-        self.games_widget = QWidget()
-        self.games_layout = QGridLayout(self.games_widget)
-        self.games_layout.setSpacing(20)
-        self.games_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        
-        self.games_scroll.setWidget(self.games_widget)
-        self.games_scroll.setWidgetResizable(True)
+        # Virtualized grid: cards are painted by the delegate, only for visible rows
+        self.games_model = GameListModel(self.store, self)
+        # Hits of the current search, read from the full-text index; shown instead of games_model while searching
+        self.search_model = SearchResultsModel(self.store, self)
+        self.games_delegate = GameCardDelegate(self.get_card_thumbnail, self)
+        self.games_delegate.play_clicked.connect(self.on_card_play_clicked)
+        self.games_delegate.menu_clicked.connect(self.on_card_menu_clicked)
+        self.games_delegate.thumbnail_clicked.connect(self.on_card_thumbnail_clicked)
+        
+        self.games_view = LibraryView()
+        self.games_view.setModel(self.games_model)
+        self.games_view.setItemDelegate(self.games_delegate)
+        
+        # Visible cards changed: drop decodes that haven't started, visible ones get re-requested on paint
+        self.games_view.verticalScrollBar().valueChanged.connect(self.cover_loader.cancel_pending)
+        # Browsing puts off idle prefetching; resting on a card warms that game's file
+        self.games_view.verticalScrollBar().valueChanged.connect(self.prefetcher.note_activity)
+        self.games_view.entered.connect(self.on_card_hovered)
+        self.games_model.modelReset.connect(self.cover_loader.cancel_pending)
+        self.search_model.modelReset.connect(self.cover_loader.cancel_pending)
+        # New games may match the current search
+        self.store.games_added.connect(self.refresh_search)
+        
+        self.store.games_reset.connect(self.update_stats_label)
+        self.store.games_loaded.connect(self.update_stats_label)
+        self.store.games_added.connect(self.update_stats_label)
+        self.store.game_removed.connect(self.update_stats_label)
+        self.store.game_changed.connect(self.update_stats_label)
         
         layout.addWidget(toolbar)
-        layout.addWidget(self.games_scroll)
+        layout.addWidget(self.games_view)
+    
+    def setup_stats_tab(self):
+        layout = QVBoxLayout(self.stats_tab)
+        group_style = """
+            QGroupBox {
+                font-weight: bold;
+                border: 2px solid #4CAF50;
+                border-radius: 5px;
+                margin-top: 10px;
+                padding-top: 10px;
+            }
+        """
+        
+        self.play_totals_label = QLabel("")
+        self.play_totals_label.setStyleSheet("font-size: 13px; padding: 5px;")
+        layout.addWidget(self.play_totals_label)
+        
+        days_group = QGroupBox(f"📅 Last {PLAY_STATS_DAYS} Days")
+        days_group.setStyleSheet(group_style)
+        days_layout = QVBoxLayout(days_group)
+        self.play_days_table = QTableWidget(0, 4)
+        self.play_days_table.setHorizontalHeaderLabels(["Day", "Plays", "Sessions", "Time Played"])
+        self.play_days_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.play_days_table.verticalHeader().setVisible(False)
+        self.play_days_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        days_layout.addWidget(self.play_days_table)
+        layout.addWidget(days_group)
+        
+        top_layout = QHBoxLayout()
+        self.top_game_lists = {}
+        for ranking, heading in (("play_count", "🏆 Most Played"),
+                                 ("play_seconds", "⏱️ Most Time Played"),
+                                 ("last_played", "🕒 Recently Played")):
+            group = QGroupBox(heading)
+            group.setStyleSheet(group_style)
+            group_layout = QVBoxLayout(group)
+            games_list = QListWidget()
+            group_layout.addWidget(games_list)
+            top_layout.addWidget(group)
+            self.top_game_lists[ranking] = games_list
+        layout.addLayout(top_layout)
+    
+    @staticmethod
+    def format_play_time(seconds):
+        """Format a number of seconds as e.g. '3h 05m', '12m 30s'"""
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}h {minutes:02d}m"
+        return f"{minutes}m {seconds:02d}s"
+    
+    def refresh_play_stats(self, *args):
+        """Fill the stats tab from the rollup tables; skipped while the tab isn't showing"""
+        if self.tabs.currentWidget() is not self.stats_tab:
+            return
+        # Plays still waiting in the write-behind queue belong in the numbers
+        self.store.play_stats.flush()
+        games, plays, sessions, seconds = self.db.get_library_stats()
+        average = self.format_play_time(seconds / sessions) if sessions else "-"
+        self.play_totals_label.setText(
+            f"📊 {games} games | 🎮 {plays} plays | 🕹️ {sessions} sessions | "
+            f"⏱️ {self.format_play_time(seconds)} played | average session {average}")
+        
+        days = self.db.get_play_days(PLAY_STATS_DAYS)
+        self.play_days_table.setRowCount(len(days))
+        for row, (day, day_plays, day_sessions, day_seconds) in enumerate(days):
+            values = (day, str(day_plays), str(day_sessions), self.format_play_time(day_seconds))
+            for column, value in enumerate(values):
+                self.play_days_table.setItem(row, column, QTableWidgetItem(value))
+        
+        for ranking, games_list in self.top_game_lists.items():
+            games_list.clear()
+            for game in self.db.get_top_games(ranking, PLAY_STATS_TOP, ('id', 'title', ranking)):
+                if ranking == "play_count":
+                    detail = f"{game.play_count} plays"
+                elif ranking == "play_seconds":
+                    detail = self.format_play_time(game.play_seconds)
+                else:
+                    detail = game.last_played
+                games_list.addItem(f"{game.title}  ({detail})")
     
     def setup_settings_tab(self):
         layout = QVBoxLayout(self.settings_tab)
@@ -731,6 +872,31 @@ class GameLibraryApp(QMainWindow):
         test_player_btn.clicked.connect(self.test_current_player)
         player_layout.addWidget(test_player_btn)
         
+        # Stops a burst of double-clicks from starting a pile of players
+        max_running_layout = QHBoxLayout()
+        max_running_layout.addWidget(QLabel("Games running at once:"))
+        self.max_running_spin = QSpinBox()
+        self.max_running_spin.setRange(1, 16)
+        self.max_running_spin.setValue(self.launcher.max_running)
+        max_running_layout.addWidget(self.max_running_spin)
+        max_running_layout.addStretch()
+        player_layout.addLayout(max_running_layout)
+        
+        # Game files warmed in the page cache ahead of a launch
+        prefetch_layout = QHBoxLayout()
+        prefetch_layout.addWidget(QLabel("Prefetch likely games (MB, 0 = off):"))
+        self.prefetch_budget_spin = QSpinBox()
+        self.prefetch_budget_spin.setRange(0, 4096)
+        self.prefetch_budget_spin.setValue(self.config.get("prefetch_budget_mb", DEFAULT_BUDGET_MB))
+        prefetch_layout.addWidget(self.prefetch_budget_spin)
+        prefetch_layout.addStretch()
+        player_layout.addLayout(prefetch_layout)
+        
+        self.launch_stats_label = QLabel("")
+        self.launch_stats_label.setStyleSheet("color: #aaa; font-size: 11px; padding-left: 20px;")
+        player_layout.addWidget(self.launch_stats_label)
+        self.update_launch_stats_label()
+        
         browser_group = QGroupBox("🌐 In-App Browser & Cover Settings")
         browser_group.setStyleSheet(player_group.styleSheet())
         browser_layout = QVBoxLayout(browser_group)
@@ -770,8 +936,53 @@ class GameLibraryApp(QMainWindow):
         cover_style_layout.addWidget(self.name_background_rb)
         cover_style_layout.addWidget(self.default_picture_rb)
         
+        # Memory budget for covers kept in RAM
+        cache_layout = QHBoxLayout()
+        cache_layout.addWidget(QLabel("Thumbnail memory cache (MB):"))
+        self.thumbnail_cache_spin = QSpinBox()
+        self.thumbnail_cache_spin.setRange(8, 2048)
+        self.thumbnail_cache_spin.setValue(self.config.get("thumbnail_cache_mb", 64))
+        cache_layout.addWidget(self.thumbnail_cache_spin)
+        cache_layout.addStretch()
+        cover_style_layout.addLayout(cache_layout)
+        
+        self.cache_stats_label = QLabel("")
+        self.cache_stats_label.setStyleSheet("color: #aaa; font-size: 11px; padding-left: 20px;")
+        cover_style_layout.addWidget(self.cache_stats_label)
+        
         browser_layout.addWidget(cover_style_group)
         
+        extract_covers_btn = QPushButton("🎞️ Extract Covers from Game Files")
+        extract_covers_btn.setToolTip("Give every game on the default cover the largest picture inside its SWF file (no internet needed)")
+        extract_covers_btn.clicked.connect(self.extract_all_covers)
+        browser_layout.addWidget(extract_covers_btn)
+        
+        watch_group = QGroupBox("📁 Watched Folders")
+        watch_group.setStyleSheet(player_group.styleSheet())
+        watch_layout = QVBoxLayout(watch_group)
+        
+        watch_info = QLabel("New, changed and deleted SWF files in these folders are synced automatically")
+        watch_info.setStyleSheet("color: #aaa; font-size: 11px;")
+        watch_layout.addWidget(watch_info)
+        
+        self.watch_folders_list = QListWidget()
+        self.watch_folders_list.addItems(self.config["watch_folders"])
+        self.watch_folders_list.setMaximumHeight(90)
+        watch_layout.addWidget(self.watch_folders_list)
+        
+        watch_buttons_layout = QHBoxLayout()
+        add_watch_btn = QPushButton("➕ Add Folder")
+        add_watch_btn.clicked.connect(self.add_watch_folder)
+        remove_watch_btn = QPushButton("➖ Remove Folder")
+        remove_watch_btn.clicked.connect(self.remove_watch_folder)
+        rescan_watch_btn = QPushButton("🔄 Rescan Now")
+        rescan_watch_btn.clicked.connect(lambda: self.folder_watcher.sync_all())
+        watch_buttons_layout.addWidget(add_watch_btn)
+        watch_buttons_layout.addWidget(remove_watch_btn)
+        watch_buttons_layout.addWidget(rescan_watch_btn)
+        watch_buttons_layout.addStretch()
+        watch_layout.addLayout(watch_buttons_layout)
+        
         danger_group = QGroupBox("⚠️  Dangerous Actions")
         danger_group.setStyleSheet("""
             QGroupBox {
@@ -787,6 +998,47 @@ class GameLibraryApp(QMainWindow):
         import_btn = QPushButton("📂 Import All SWF Files from Folder")
         import_btn.clicked.connect(self.import_from_folder)
         
+        import_archives_btn = QPushButton("🗜️ Import from Archives")
+        import_archives_btn.clicked.connect(self.import_from_archives)
+        
+        # How imported files get into the hidden games folder
+        strategy_layout = QHBoxLayout()
+        strategy_layout.addWidget(QLabel("Store imported files by:"))
+        self.import_strategy_combo = QComboBox()
+        strategy_labels = {
+            "auto": "Auto (reflink, else hardlink, else copy)",
+            "reflink": "Reflink (copy-on-write clone)",
+            "hardlink": "Hardlink (same drive only)",
+            "move": "Move (removes the original)",
+            "copy": "Copy",
+        }
+        for strategy in IMPORT_STRATEGIES:
+            self.import_strategy_combo.addItem(strategy_labels[strategy], strategy)
+        current_strategy = self.config.get("import_strategy", "auto")
+        self.import_strategy_combo.setCurrentIndex(max(0, self.import_strategy_combo.findData(current_strategy)))
+        strategy_layout.addWidget(self.import_strategy_combo)
+        strategy_layout.addStretch()
+        
+        # Uncompressed (FWS) games can be stored zlib (CWS) or LZMA (ZWS) compressed; players load both
+        compression_layout = QHBoxLayout()
+        compression_layout.addWidget(QLabel("Compress stored games:"))
+        self.vault_compression_combo = QComboBox()
+        self.vault_compression_combo.addItem("Off (keep files byte-for-byte)", "off")
+        self.vault_compression_combo.addItem("zlib (CWS, any Flash Player 6+)", "zlib")
+        self.vault_compression_combo.addItem("LZMA (ZWS, smaller, Flash Player 11+ games)", "lzma")
+        current_compression = self.config.get("vault_compression", "off")
+        self.vault_compression_combo.setCurrentIndex(max(0, self.vault_compression_combo.findData(current_compression)))
+        compression_layout.addWidget(self.vault_compression_combo)
+        optimize_btn = QPushButton("🗜️ Optimize Vault")
+        optimize_btn.setToolTip("Compress the uncompressed games already in the hidden games folder")
+        optimize_btn.clicked.connect(self.optimize_vault)
+        compression_layout.addWidget(optimize_btn)
+        compression_layout.addStretch()
+        
+        self.compression_stats_label = QLabel("")
+        self.compression_stats_label.setStyleSheet("color: #aaa; font-size: 11px; padding-left: 20px;")
+        self.update_compression_stats_label()
+        
         clear_btn = QPushButton("🗑️ DELETE ALL GAMES")
         clear_btn.clicked.connect(self.clear_library)
         clear_btn.setStyleSheet("""
@@ -801,7 +1053,11 @@ class GameLibraryApp(QMainWindow):
             }
         """)
         
+        danger_layout.addLayout(strategy_layout)
+        danger_layout.addLayout(compression_layout)
+        danger_layout.addWidget(self.compression_stats_label)
         danger_layout.addWidget(import_btn)
+        danger_layout.addWidget(import_archives_btn)
         danger_layout.addWidget(clear_btn)
         
         save_btn = QPushButton("💾 Save Settings")
@@ -810,194 +1066,134 @@ class GameLibraryApp(QMainWindow):
         
         layout.addWidget(player_group)
         layout.addWidget(browser_group)
+        layout.addWidget(watch_group)
         layout.addWidget(danger_group)
         layout.addStretch()
         layout.addWidget(save_btn)
     
+    def add_watch_folder(self):
+        """Start watching a folder chosen by the user"""
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Watch")
+        if not folder:
+            return
+        folder = os.path.abspath(folder)
+        if folder in self.config["watch_folders"]:
+            return
+        self.config["watch_folders"].append(folder)
+        self.watch_folders_list.addItem(folder)
+        self.write_config()
+        self.folder_watcher.set_roots(
+            self.config["watch_folders"], self.config.get("import_strategy", "auto"), self.vault_compression())
+        self.statusBar().showMessage(f"📁 Watching {folder}", 3000)
+    
+    def remove_watch_folder(self):
+        """Stop watching the selected folder; games already imported from it stay"""
+        item = self.watch_folders_list.currentItem()
+        if not item:
+            return
+        self.config["watch_folders"].remove(item.text())
+        self.watch_folders_list.takeItem(self.watch_folders_list.row(item))
+        self.write_config()
+        self.folder_watcher.set_roots(
+            self.config["watch_folders"], self.config.get("import_strategy", "auto"), self.vault_compression())
+    
+    def on_watch_folder_synced(self, root, added, updated, removed):
+        changes = [f"{count} {label}" for count, label in ((added, "added"), (updated, "updated"), (removed, "removed")) if count]
+        self.statusBar().showMessage(f"📁 {os.path.basename(root)}: {', '.join(changes)}", 5000)
+    
     def load_games(self):
-        """Load and display games from database"""
-        for i in reversed(range(self.games_layout.count())): 
-            widget = self.games_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        games = self.db.get_all_games()
-        
-        # Update stats
-        total_games = len(games)
-        total_plays = sum(game[6] for game in games)  # play_count is at index 6
-        
-        self.stats_label.setText(f"📊 Games: {total_games} | 🎮 Total Plays: {total_plays}")
-        
-        for i, game in enumerate(games):
-            game_id, title, swf_path, thumbnail_path, added_date, last_played, play_count = game
-            
-            card = self.create_game_card(game_id, title, swf_path, thumbnail_path, play_count)
-            
-            row = i // 4
-            col = i % 4
-            self.games_layout.addWidget(card, row, col)
-        
-        self.games_layout.setRowStretch(self.games_layout.rowCount(), 1)
+        """Reload all games from the database into the library store"""
+        self.thumbnail_cache.clear()
+        self.store.load()
     
-    def create_game_card(self, game_id, title, swf_path, thumbnail_path, play_count):
-        """Create a game card widget"""
-        card = QWidget()
-        card.setFixedSize(220, 280)
-        card.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                border-radius: 8px;
-                border: 1px solid #444;
-            }
-            QWidget:hover {
-                border: 1px solid #4CAF50;
-                background-color: #333;
-            }
-        """)
-        
-        layout = QVBoxLayout(card)
-        layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(8)
-        
-        thumbnail_label = QLabel()
-        thumbnail_label.setFixedSize(180, 140)
-        thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        thumbnail_label.setCursor(Qt.CursorShape.PointingHandCursor)
-        
-        pixmap = self.create_thumbnail(thumbnail_path, title)
-        thumbnail_label.setPixmap(pixmap)
-        
-        thumbnail_label.mousePressEvent = lambda event, gid=game_id, t=title, sp=swf_path: self.edit_game_thumbnail(gid, t, sp)
-        
-        title_label = QLabel(title)
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-weight: bold; font-size: 14px;")
-        title_label.setWordWrap(True)
-        
-        info_label = QLabel(f"▶️ Plays: {play_count}")
-        info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        info_label.setStyleSheet("color: #aaa; font-size: 12px;")
-        
-        play_btn = QPushButton("🎮 Play")
-        play_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #66bb6a;
-            }
-        """)
-        play_btn.clicked.connect(lambda: self.play_game(game_id, title, swf_path))
-        
-        menu_btn = QPushButton("⋯ Menu")
-        menu_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #666;
-                font-size: 11px;
-                padding: 4px;
-            }
-            QPushButton:hover {
-                background-color: #777;
-            }
-        """)
-        menu_btn.clicked.connect(lambda: self.show_game_menu(game_id, title, swf_path))
-        
-        button_layout = QHBoxLayout()
-        button_layout.addWidget(play_btn)
-        button_layout.addWidget(menu_btn)
-        
-        layout.addWidget(thumbnail_label)
-        layout.addWidget(title_label)
-        layout.addWidget(info_label)
-        layout.addLayout(button_layout)
-        
-        return card
+    def update_cache_stats_label(self, *args):
+        """Show how well the cover cache is doing in the settings tab"""
+        stats = self.thumbnail_cache.stats()
+        self.cache_stats_label.setText(
+            f"In use: {stats['used_bytes'] / (1024 * 1024):.1f} / {stats['budget_bytes'] / (1024 * 1024):.0f} MB "
+            f"({stats['entries']} covers) | Hits: {stats['hits']} | Misses: {stats['misses']} "
+            f"({stats['hit_rate']:.0%} hit rate) | Evictions: {stats['evictions']}")
+    
+    def update_stats_label(self, *args):
+        """Refresh the header stats from the store's running totals"""
+        self.stats_label.setText(
+            f"📊 Games: {self.store.total_count} | 🎮 Total Plays: {self.store.total_plays} | "
+            f"⏱️ Played: {self.format_play_time(self.store.total_seconds)}")
+    
+    def get_card_thumbnail(self, index):
+        """Return the cover pixmap for a painted card"""
+        return self.create_thumbnail(index.data(ThumbnailPathRole), index.data())
+    
+    def on_cover_loaded(self, key, image):
+        """Swap a decoded or generated cover in for the placeholder"""
+        self.thumbnail_cache.put(key, QPixmap.fromImage(image))
+        self.games_view.viewport().update()
+    
+    def on_card_hovered(self, index):
+        self.prefetcher.hover(index.data(SwfPathRole))
+    
+    def on_card_play_clicked(self, index):
+        self.play_game(index.data(GameIdRole), index.data(), index.data(SwfPathRole))
+    
+    def on_card_menu_clicked(self, index):
+        self.show_game_menu(index.data(GameIdRole), index.data(), index.data(SwfPathRole))
+    
+    def on_card_thumbnail_clicked(self, index):
+        self.edit_game_thumbnail(index.data(GameIdRole), index.data(), index.data(SwfPathRole))
+    
+    def invalidate_cover(self, thumbnail_path):
+        """Forget every cached rendering of a cover image that changed or went away"""
+        if not thumbnail_path:
+            return
+        self.thumb_disk_cache.invalidate(thumbnail_path)
+        self.thumbnail_cache.pop(thumbnail_path, None)
     
     def create_thumbnail(self, thumbnail_path, title):
         """Create thumbnail based on settings"""
         # If there's a custom thumbnail, use it
-        if thumbnail_path and os.path.exists(thumbnail_path):
-            pixmap = QPixmap(thumbnail_path)
-            return pixmap.scaled(180, 140, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        if thumbnail_path:
+            pixmap = self.cover_pixmap(thumbnail_path)
+            if pixmap is not None:
+                return pixmap
         
         # Otherwise, use default style based on settings
         style = self.config.get("thumbnail_style", "name_background")
         
-        if style == "default_picture" and os.path.exists(self.default_cover_path):
+        if style == "default_picture":
             # Use default picture from covers folder
-            pixmap = QPixmap(self.default_cover_path)
-            return pixmap.scaled(180, 140, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        else:
-            # Create name-based background
-            return self.create_name_based_thumbnail(title)
+            pixmap = self.cover_pixmap(self.default_cover_path)
+            if pixmap is not None:
+                return pixmap
+        
+        # Create name-based background, rendered off-thread and memoized
+        pixmap = self.thumbnail_cache.get((title, "name_background", 180, 140))
+        if pixmap is None:
+            self.cover_loader.request_generated(title, "name_background")
+            return self.placeholder_pixmap
+        return pixmap
+    
+    def cover_pixmap(self, source_path):
+        """Return the decoded cover for an image file, the placeholder while it loads, or None if it can't be loaded"""
+        pixmap = self.thumbnail_cache.get(source_path)
+        if pixmap is None:
+            self.cover_loader.request(source_path)
+            return self.placeholder_pixmap
+        if pixmap.isNull():
+            return None
+        return pixmap
     
-    def create_name_based_thumbnail(self, title):
-        """Create a nice default thumbnail with game name"""
+    def create_placeholder_thumbnail(self):
+        """Cheap cover shown while the real one is decoded"""
         pixmap = QPixmap(180, 140)
-        
-        # Create gradient background
         gradient = QLinearGradient(0, 0, 180, 140)
-        gradient.setColorAt(0, QColor(70, 70, 120))
-        gradient.setColorAt(1, QColor(30, 30, 60))
+        gradient.setColorAt(0, QColor(50, 50, 80))
+        gradient.setColorAt(1, QColor(30, 30, 50))
         
         painter = QPainter(pixmap)
         painter.fillRect(pixmap.rect(), gradient)
-        
-        # Draw game icon
-        painter.setPen(QColor(100, 200, 255, 150))
-        painter.setBrush(QColor(100, 200, 255, 50))
-        painter.drawEllipse(90, 50, 60, 60)
-        
-        # Draw game title
-        painter.setPen(QColor(255, 255, 255))
-        painter.setFont(QFont("Arial", 11, QFont.Weight.Bold))
-        
-        # Split title if too long
-        if len(title) > 15:
-            words = title.split()
-            lines = []
-            current_line = ""
-            
-            for word in words:
-                if len(current_line) + len(word) + 1 <= 15:
-                    current_line += (" " if current_line else "") + word
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                    current_line = word
-            
-            if current_line:
-                lines.append(current_line)
-            
-            # Draw multiple lines
-            font_metrics = painter.fontMetrics()
-            line_height = font_metrics.height()
-            total_height = len(lines) * line_height
-            start_y = (140 - total_height) // 2 + font_metrics.ascent()
-            
-            for i, line in enumerate(lines):
-                text_rect = painter.fontMetrics().boundingRect(line)
-                x = (180 - text_rect.width()) // 2
-                y = start_y + (i * line_height)
-                painter.drawText(x, y, line)
-        else:
-            # Draw single line
-            text_rect = painter.fontMetrics().boundingRect(title)
-            x = (180 - text_rect.width()) // 2
-            y = (140 - text_rect.height()) // 2 + painter.fontMetrics().ascent()
-            painter.drawText(x, y, title)
-        
-        # Draw "Flash Game" label
-        painter.setFont(QFont("Arial", 8))
-        painter.setPen(QColor(200, 200, 200))
-        painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter, "FLASH GAME")
-        
         painter.end()
         
-        return pixmap.scaled(180, 140, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        return pixmap
     
     def add_game_dialog(self):
         """Open dialog to add a new game"""
@@ -1096,24 +1292,22 @@ class GameLibraryApp(QMainWindow):
             if not title:
                 title = os.path.splitext(os.path.basename(swf_path))[0]
             
-            # Copy to hidden folder
-            new_swf_path = self.copy_to_hidden_folder(swf_path, title)
+            # Check the custom image before anything is stored: a move takes the SWF file away
+            thumb_source = custom_file_input.text()
+            if custom_rb.isChecked():
+                if not thumb_source:
+                    QMessageBox.warning(dialog, "No Image", "Please select a custom image!")
+                    return
+                if not os.path.exists(thumb_source):
+                    QMessageBox.warning(dialog, "Invalid File", "Selected image file doesn't exist!")
+                    return
             
             thumbnail_path = None
             
             # Handle thumbnail based on selected option
             if custom_rb.isChecked():
                 # Custom image
-                if custom_file_input.text():
-                    thumb_source = custom_file_input.text()
-                    if os.path.exists(thumb_source):
-                        thumbnail_path = self.save_thumbnail(thumb_source, title)
-                    else:
-                        QMessageBox.warning(dialog, "Invalid File", "Selected image file doesn't exist!")
-                        return
-                else:
-                    QMessageBox.warning(dialog, "No Image", "Please select a custom image!")
-                    return
+                thumbnail_path = self.save_thumbnail(thumb_source, title)
                     
             elif web_rb.isChecked():
                 # Web search
@@ -1125,8 +1319,9 @@ class GameLibraryApp(QMainWindow):
             
             # If default is selected or web search failed, thumbnail_path remains None (will use default)
             
-            self.db.add_game(title, new_swf_path, thumbnail_path)
-            self.load_games()
+            # Stored last, right before the game row that points at it
+            new_swf_path, content_hash = self.copy_to_hidden_folder(swf_path)
+            self.store.add_game(title, new_swf_path, thumbnail_path, content_hash, read_header(new_swf_path))
             
             # Determine what thumbnail was used
             if thumbnail_path:
@@ -1154,32 +1349,23 @@ class GameLibraryApp(QMainWindow):
         
         dialog.exec()
     
-    def copy_to_hidden_folder(self, swf_path, title):
-        """Copy SWF file to hidden games folder"""
+    def copy_to_hidden_folder(self, swf_path):
+        """Store SWF file in the content-addressed hidden games folder; returns (path, content hash)"""
         try:
-            base_name = os.path.basename(swf_path)
-            name, ext = os.path.splitext(base_name)
-            
-            # Clean title for filename
-            clean_title = title.replace(' ', '_')
-            clean_title = "".join(c for c in clean_title if c.isalnum() or c in ('_', '-')).strip()
-            
-            new_filename = f"{clean_title}{ext}"
-            new_path = os.path.join(self.hidden_games_folder, new_filename)
-            
-            counter = 1
-            while os.path.exists(new_path):
-                new_filename = f"{clean_title}_{counter}{ext}"
-                new_path = os.path.join(self.hidden_games_folder, new_filename)
-                counter += 1
-            
-            shutil.copy2(swf_path, new_path)
-            return new_path
+            # Read first: a move takes the original away
+            original_size = os.path.getsize(swf_path)
+            new_path, content_hash, method = store_content(
+                swf_path, self.hidden_games_folder, strategy=self.config.get("import_strategy", "auto"),
+                compression=self.vault_compression())
+            if method in COMPRESSION_METHODS:
+                self.db.record_compression(content_hash, original_size, os.path.getsize(new_path))
+            self.statusBar().showMessage(f"Game file stored by {method}", 3000)
+            return new_path, content_hash
             
         except Exception as e:
             QMessageBox.warning(self, "Copy Failed", 
                 f"Could not copy to hidden folder:\n{str(e)}\n\nUsing original location.")
-            return swf_path
+            return swf_path, None
     
     def save_thumbnail(self, image_path, title):
         """Save thumbnail to hidden covers folder"""
@@ -1323,10 +1509,13 @@ class GameLibraryApp(QMainWindow):
         custom_btn = QPushButton("📁 Use Custom Image")
         custom_btn.clicked.connect(lambda: self.update_thumbnail_from_file(game_id, dialog))
         
+        extract_btn = QPushButton("🎞️ Extract from Game File")
+        extract_btn.clicked.connect(lambda: self.update_thumbnail_from_swf(game_id, swf_path, dialog, extract_btn))
+        
         default_btn = QPushButton(f"🎨 Use Default ({default_style_name})")
         default_btn.clicked.connect(lambda: self.update_thumbnail_to_default(game_id, dialog))
         
-        for btn in [online_btn, custom_btn, default_btn]:
+        for btn in [online_btn, custom_btn, extract_btn, default_btn]:
             btn.setStyleSheet("text-align: left; padding: 10px;")
             layout.addWidget(btn)
         
@@ -1343,10 +1532,7 @@ class GameLibraryApp(QMainWindow):
         thumbnail_path = self.open_inapp_browser_search(title, dialog)
         
         if thumbnail_path:
-            cursor = self.db.conn.cursor()
-            cursor.execute('UPDATE games SET thumbnail_path = ? WHERE id = ?', (thumbnail_path, game_id))
-            self.db.conn.commit()
-            self.load_games()
+            self.replace_cover(game_id, thumbnail_path)
             QMessageBox.information(self, "Success", "Thumbnail updated from web search!")
             dialog.accept()
     
@@ -1358,29 +1544,62 @@ class GameLibraryApp(QMainWindow):
         )
         
         if file_path:
-            cursor = self.db.conn.cursor()
-            cursor.execute('SELECT title FROM games WHERE id = ?', (game_id,))
-            result = cursor.fetchone()
-            title = result[0] if result else f"game_{game_id}"
+            game = self.store.get(game_id)
+            title = game.title if game else f"game_{game_id}"
             
             thumbnail_path = self.save_thumbnail(file_path, title)
             
             if thumbnail_path:
-                cursor.execute('UPDATE games SET thumbnail_path = ? WHERE id = ?', (thumbnail_path, game_id))
-                self.db.conn.commit()
-                self.load_games()
+                self.replace_cover(game_id, thumbnail_path)
                 QMessageBox.information(self, "Success", "Custom thumbnail saved!")
                 dialog.accept()
     
+    def update_thumbnail_from_swf(self, game_id, swf_path, dialog, button):
+        """Use the largest picture embedded in the game's SWF file as its thumbnail"""
+        # A big file takes a while to parse; do it on a worker thread so the window stays responsive
+        button.setEnabled(False)
+        button.setText("🎞️ Extracting...")
+        signals = CoverTaskSignals(dialog)
+        signals.finished.connect(
+            lambda thumbnail_path: self.on_swf_thumbnail_extracted(game_id, thumbnail_path, dialog, button))
+        QThreadPool.globalInstance().start(
+            CoverTask(swf_path, cover_base_path(self.hidden_covers_folder, game_id), signals))
+    
+    def on_swf_thumbnail_extracted(self, game_id, thumbnail_path, dialog, button):
+        button.setEnabled(True)
+        button.setText("🎞️ Extract from Game File")
+        if not dialog.isVisible():
+            # The dialog was cancelled while the file was parsed
+            game = self.store.get(game_id)
+            if thumbnail_path and not (game and game.thumbnail_path == thumbnail_path):
+                try:
+                    os.remove(thumbnail_path)
+                except OSError:
+                    pass
+            return
+        
+        if thumbnail_path:
+            self.replace_cover(game_id, thumbnail_path)
+            QMessageBox.information(self, "Success", "Thumbnail extracted from the game file!")
+            dialog.accept()
+        else:
+            QMessageBox.information(self, "No Picture Found", 
+                "This game file has no embedded picture large enough for a thumbnail.")
+    
     def update_thumbnail_to_default(self, game_id, dialog):
         """Set thumbnail to default"""
-        cursor = self.db.conn.cursor()
-        cursor.execute('UPDATE games SET thumbnail_path = ? WHERE id = ?', (None, game_id))
-        self.db.conn.commit()
-        self.load_games()
+        self.replace_cover(game_id, None)
         QMessageBox.information(self, "Success", "Thumbnail set to default!")
         dialog.accept()
     
+    def replace_cover(self, game_id, thumbnail_path):
+        """Point a game at a new cover and drop cached renderings of the old and new files"""
+        game = self.store.get(game_id)
+        if game:
+            self.invalidate_cover(game.thumbnail_path)
+        self.invalidate_cover(thumbnail_path)
+        self.store.set_thumbnail(game_id, thumbnail_path)
+    
     def show_game_menu(self, game_id, title, swf_path):
         """Show context menu for game"""
         menu = QMenu(self)
@@ -1419,25 +1638,22 @@ class GameLibraryApp(QMainWindow):
                 "Flash player path is invalid or file doesn't exist.")
             return
         
-        games = self.db.get_all_games()
+        # Any one game will do; don't read the whole table for it
+        games = self.db.get_games_page(None, 1, ('title', 'swf_path'))
         if games:
-            test_file = games[0][2]
-            try:
-                subprocess.Popen([player_path, test_file])
-                QMessageBox.information(self, "Test Successful", 
-                    f"Flash player launched successfully!\n\n"
-                    f"Player: {os.path.basename(player_path)}\n"
-                    f"Test Game: {games[0][1]}")
-            except Exception as e:
-                QMessageBox.critical(self, "Test Failed", 
-                    f"Failed to launch Flash player:\n\n{str(e)}")
+            # Not a play of the game, so no game id; the result is reported by on_session_started/on_launch_failed
+            if self.launcher.launch(None, games[0].title, games[0].swf_path, player_path) is None:
+                QMessageBox.information(self, "Too Many Games Running", self.launcher.refusal(None))
         else:
             QMessageBox.information(self, "No Games", 
                 "Add a game first to test the Flash player.")
     
     def play_game(self, game_id, title, swf_path):
         """Play the selected game"""
-        self.db.update_play_stats(game_id)
+        refusal = self.launcher.refusal(game_id)
+        if refusal:
+            self.statusBar().showMessage(f"⏳ {title} not started: {refusal}", 5000)
+            return
         
         player_path = self.player_path_input.text() or self.config["flash_players"][0]["path"]
         
@@ -1455,13 +1671,52 @@ class GameLibraryApp(QMainWindow):
             else:
                 return
         
-        try:
-            subprocess.Popen([player_path, swf_path])
-            self.statusBar().showMessage(f"🎮 Playing: {title}", 3000)
-            
-        except Exception as e:
+        # Timed from here, so a player-not-found dialog doesn't count towards the launch latency;
+        # the play is recorded once the player has started (on_session_started)
+        self.launcher.launch(game_id, title, swf_path, player_path)
+    
+    def on_session_started(self, session):
+        if session.game_id is not None:
+            self.store.record_play(session.game_id)
+            self.prefetcher.record_launch(session.swf_path)
+        self.update_launch_stats_label()
+        latency = f"started in {session.launch_latency * 1000:.0f} ms"
+        if session.game_id is None:
+            QMessageBox.information(self, "Test Successful", 
+                f"Flash player launched successfully!\n\n"
+                f"Player: {os.path.basename(session.player_path)}\n"
+                f"Test Game: {session.title}\n"
+                f"Launch: {latency}")
+        else:
+            self.statusBar().showMessage(f"🎮 Playing: {session.title} ({latency})", 3000)
+    
+    def on_session_finished(self, session):
+        # Test launches aren't plays of a game
+        if session.game_id is not None:
+            self.store.record_session(session)
+            self.update_stats_label()
+            self.refresh_play_stats()
+    
+    def on_launch_failed(self, session, message):
+        if session.game_id is None:
+            QMessageBox.critical(self, "Test Failed", 
+                f"Failed to launch Flash player:\n\n{message}")
+        else:
             QMessageBox.critical(self, "Launch Failed", 
-                f"Error launching game:\n\n{str(e)}")
+                f"Error launching game:\n\n{message}")
+    
+    def update_launch_stats_label(self):
+        stats = self.launcher.latency_stats()
+        if stats is None:
+            self.launch_stats_label.setText("Launch time: no games started yet")
+            return
+        count, average, worst = stats
+        text = (f"Launch time (click to player running): {average * 1000:.0f} ms average, "
+                f"{worst * 1000:.0f} ms worst over the last {count} launches")
+        launches, hits = self.prefetcher.hit_stats()
+        if launches:
+            text += f"\nPrefetch hits: {hits} of {launches} launches found their file already warm ({hits / launches:.0%})"
+        self.launch_stats_label.setText(text)
     
     def remove_game(self, game_id, title):
         """Remove game from library"""
@@ -1475,53 +1730,223 @@ class GameLibraryApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            cursor = self.db.conn.cursor()
-            cursor.execute('SELECT swf_path, thumbnail_path FROM games WHERE id = ?', (game_id,))
-            result = cursor.fetchone()
+            game = self.store.get(game_id)
             
-            if result:
-                swf_path, thumb_path = result
-                
-                # Only delete custom thumbnails, not the default cover
-                if thumb_path and os.path.exists(thumb_path) and thumb_path != self.default_cover_path:
-                    try:
-                        os.remove(thumb_path)
-                    except:
-                        pass
+            if game:
+                swf_path = game.swf_path
+                self.delete_cover_file(game.thumbnail_path)
                 
-                if self.hidden_games_folder in swf_path and os.path.exists(swf_path):
+                # Identical games share one stored file; keep it while another game uses it
+                if (self.hidden_games_folder in swf_path and os.path.exists(swf_path)
+                        and self.db.count_games_with_swf_path(swf_path) <= 1):
                     try:
                         os.remove(swf_path)
                     except:
                         pass
             
-            cursor.execute('DELETE FROM games WHERE id = ?', (game_id,))
-            self.db.conn.commit()
-            self.load_games()
+            self.store.remove_game(game_id)
             QMessageBox.information(self, "Removed", f"'{title}' removed from library!")
     
+    def delete_cover_file(self, thumb_path):
+        """Delete a removed game's cover image and its cached renderings"""
+        # Only delete custom thumbnails, not the default cover
+        if thumb_path and os.path.exists(thumb_path) and thumb_path != self.default_cover_path:
+            self.invalidate_cover(thumb_path)
+            try:
+                os.remove(thumb_path)
+            except:
+                pass
+    
+    def make_progress_dialog(self, title, label, on_cancel):
+        """Show a progress dialog for a background job; on_cancel runs if the user cancels it"""
+        # Non-modal so the library stays usable while the job runs
+        dialog = QProgressDialog(label, "Cancel", 0, 0, self)
+        dialog.setWindowTitle(title)
+        dialog.setWindowModality(Qt.WindowModality.NonModal)
+        dialog.setMinimumDuration(0)
+        dialog.setMinimumWidth(420)
+        dialog.canceled.connect(on_cancel)
+        dialog.show()
+        return dialog
+    
+    def close_progress_dialog(self, dialog, on_cancel):
+        """Close a background job's progress dialog once the job is over"""
+        # Closing the dialog emits canceled, which would otherwise cancel a job that has already ended
+        dialog.canceled.disconnect(on_cancel)
+        dialog.close()
+    
     def import_from_folder(self):
-        """Import all SWF files from a folder"""
+        """Import all SWF files from a folder and its subfolders"""
+        if self.folder_importer.running:
+            QMessageBox.information(self, "Import Running", "An import is already in progress.")
+            return
+        
         folder = QFileDialog.getExistingDirectory(self, "Select Folder with SWF Files")
         if folder:
-            count = 0
-            for file in os.listdir(folder):
-                if file.lower().endswith('.swf'):
-                    swf_path = os.path.join(folder, file)
-                    title = os.path.splitext(file)[0]
-                    
-                    cursor = self.db.conn.cursor()
-                    cursor.execute('SELECT id FROM games WHERE swf_path = ?', (swf_path,))
-                    if not cursor.fetchone():
-                        new_path = self.copy_to_hidden_folder(swf_path, title)
-                        # Add with default thumbnail (None means use default style)
-                        self.db.add_game(title, new_path, None)
-                        count += 1
-            
-            self.load_games()
-            QMessageBox.information(self, "Import Complete", 
-                f"Imported {count} new games with default thumbnails!\n\n"
-                f"All games copied to: {self.hidden_games_folder}")
+            self.import_progress = self.make_progress_dialog("Importing Games", "Scanning folder...", self.cancel_import)
+            self.folder_importer.start(folder, self.config.get("import_strategy", "auto"), self.vault_compression())
+    
+    def import_from_archives(self):
+        """Import the SWF files inside ZIP, 7z and tar archives without extracting them first"""
+        if self.folder_importer.running:
+            QMessageBox.information(self, "Import Running", "An import is already in progress.")
+            return
+        
+        patterns = " ".join(f"*{ext}" for ext in ARCHIVE_EXTENSIONS)
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Archives with SWF Files", "", f"Archives ({patterns})")
+        if not paths:
+            return
+        
+        if not SEVEN_ZIP_AVAILABLE and any(path.lower().endswith('.7z') for path in paths):
+            QMessageBox.warning(self, "7z Not Supported",
+                "Importing .7z archives needs the py7zr package (pip install py7zr).\n"
+                "Any .7z archives selected will be skipped.")
+        
+        self.import_progress = self.make_progress_dialog("Importing Games", "Reading archives...", self.cancel_import)
+        self.folder_importer.start_archives(paths, self.vault_compression())
+    
+    def cancel_import(self):
+        self.folder_importer.cancel()
+        if self.import_progress:
+            self.import_progress.setLabelText("Cancelling, finishing files already being copied...")
+    
+    def update_import_progress(self):
+        """Show files, throughput and time left for the running import"""
+        importer = self.folder_importer
+        if not self.import_progress or importer.cancelled.is_set():
+            return
+        
+        self.import_progress.setMaximum(0 if importer.scanning else max(importer.files_total, 1))
+        self.import_progress.setValue(importer.files_done)
+        
+        rate = importer.throughput() / (1024 * 1024)
+        eta = importer.eta()
+        if eta is None:
+            remaining = "reading archives..." if importer.archives else "scanning folders..."
+        else:
+            minutes, seconds = divmod(int(eta), 60)
+            remaining = f"about {minutes}m {seconds:02d}s left"
+        self.import_progress.setLabelText(
+            f"Copied {importer.files_done} of {importer.files_total} games\n"
+            f"{rate:.1f} MB/s, {remaining}")
+    
+    def on_import_finished(self):
+        importer = self.folder_importer
+        if self.import_progress:
+            self.close_progress_dialog(self.import_progress, self.cancel_import)
+            self.import_progress = None
+        
+        summary = f"Imported {importer.imported} new games with default thumbnails!\n\n"
+        if importer.cancelled.is_set():
+            summary = f"Import cancelled. {importer.imported} games copied before cancelling were added.\n\n"
+        if importer.methods:
+            methods = ", ".join(f"{count} by {method}" for method, count in importer.methods.most_common())
+            summary += f"Files stored: {methods}\n\n"
+        if importer.duplicates:
+            summary += f"{importer.duplicates} files were already in the library and were skipped.\n\n"
+        if importer.failed:
+            summary += f"{importer.failed} files could not be copied and were added from their original location.\n\n"
+        if importer.unreadable:
+            summary += f"{importer.unreadable} files could not be read from their archive, or aren't SWF files, and were skipped.\n\n"
+        QMessageBox.information(self, "Import Complete", 
+            summary + f"All games copied to: {self.hidden_games_folder}")
+    
+    def extract_all_covers(self):
+        """Extract covers for every game on the default cover, in the background"""
+        if self.cover_extractor.running:
+            QMessageBox.information(self, "Extraction Running", "Covers are already being extracted.")
+            return
+        
+        self.cover_extraction_progress = self.make_progress_dialog(
+            "Extracting Covers", "Starting...", self.cancel_cover_extraction)
+        self.cover_extractor.start()
+    
+    def cancel_cover_extraction(self):
+        self.cover_extractor.cancel()
+        if self.cover_extraction_progress:
+            self.cover_extraction_progress.setLabelText("Cancelling, finishing files already being read...")
+    
+    def update_cover_extraction_progress(self):
+        extractor = self.cover_extractor
+        if not self.cover_extraction_progress or extractor.cancelled:
+            return
+        self.cover_extraction_progress.setMaximum(max(extractor.total, 1))
+        self.cover_extraction_progress.setValue(extractor.done)
+        self.cover_extraction_progress.setLabelText(
+            f"Read {extractor.done} of {extractor.total} games\n"
+            f"{extractor.found} covers found")
+    
+    def on_cover_extraction_finished(self):
+        extractor = self.cover_extractor
+        if self.cover_extraction_progress:
+            self.close_progress_dialog(self.cover_extraction_progress, self.cancel_cover_extraction)
+            self.cover_extraction_progress = None
+        
+        summary = f"Extracted covers for {extractor.found} of {extractor.done} games."
+        if extractor.cancelled:
+            summary = f"Extraction cancelled. {extractor.found} covers were extracted before cancelling."
+        elif extractor.done > extractor.found:
+            summary += f"\n\n{extractor.done - extractor.found} games have no embedded picture large enough and keep the default cover."
+        QMessageBox.information(self, "Cover Extraction Complete", summary)
+    
+    def vault_compression(self):
+        """Compression newly stored games get ('zlib' or 'lzma'), or None to store them as they are"""
+        compression = self.config.get("vault_compression", "off")
+        return compression if compression in COMPRESSION_METHODS else None
+    
+    def update_compression_stats_label(self):
+        files, bytes_saved = self.db.get_compression_totals()
+        if files:
+            self.compression_stats_label.setText(
+                f"Compression has saved {bytes_saved / (1024 * 1024):.1f} MB across {files} game files")
+        else:
+            self.compression_stats_label.setText("No game files have been compressed yet")
+    
+    def optimize_vault(self):
+        """Compress the uncompressed game files already stored, in the background"""
+        if self.vault_optimizer.running:
+            QMessageBox.information(self, "Optimization Running", "The vault is already being optimized.")
+            return
+        
+        compression = self.vault_compression_combo.currentData()
+        if compression not in COMPRESSION_METHODS:
+            QMessageBox.information(self, "Compression Off", 
+                "Choose zlib or LZMA under \"Compress stored games\" first.")
+            return
+        
+        self.vault_optimize_progress = self.make_progress_dialog(
+            "Optimizing Vault", "Starting...", self.cancel_vault_optimize)
+        self.vault_optimizer.start(compression)
+    
+    def cancel_vault_optimize(self):
+        self.vault_optimizer.cancel()
+        if self.vault_optimize_progress:
+            self.vault_optimize_progress.setLabelText("Cancelling, finishing files already being compressed...")
+    
+    def update_vault_optimize_progress(self):
+        optimizer = self.vault_optimizer
+        if not self.vault_optimize_progress or optimizer.cancelled:
+            return
+        self.vault_optimize_progress.setMaximum(max(optimizer.total, 1))
+        self.vault_optimize_progress.setValue(optimizer.done)
+        self.vault_optimize_progress.setLabelText(
+            f"Checked {optimizer.done} of {optimizer.total} games\n"
+            f"{optimizer.shrunk} files compressed, {optimizer.bytes_saved / (1024 * 1024):.1f} MB saved")
+    
+    def on_vault_optimize_finished(self):
+        optimizer = self.vault_optimizer
+        if self.vault_optimize_progress:
+            self.close_progress_dialog(self.vault_optimize_progress, self.cancel_vault_optimize)
+            self.vault_optimize_progress = None
+        self.update_compression_stats_label()
+        
+        summary = f"Compressed {optimizer.shrunk} game files, saving {optimizer.bytes_saved / (1024 * 1024):.1f} MB."
+        if optimizer.cancelled:
+            summary = "Optimization cancelled. " + summary
+        if optimizer.failed:
+            summary += f"\n\n{optimizer.failed} files could not be compressed (in use or unreadable)."
+        QMessageBox.information(self, "Vault Optimized", summary)
     
     def clear_library(self):
         """Clear all games from library"""
@@ -1551,14 +1976,15 @@ class GameLibraryApp(QMainWindow):
             )
             
             if final_reply == QMessageBox.StandardButton.Yes:
-                games = self.db.get_all_games()
-                game_count = len(games)
+                game_count = self.store.total_count
                 
                 thumb_count = 0
-                for game in games:
-                    thumb_path = game[3]
+                # Only the cover column is needed, a page at a time
+                for game in self.db.iter_games(('thumbnail_path',)):
+                    thumb_path = game.thumbnail_path
                     # Only delete custom thumbnails, not the default cover
                     if thumb_path and os.path.exists(thumb_path) and thumb_path != self.default_cover_path:
+                        self.invalidate_cover(thumb_path)
                         try:
                             os.remove(thumb_path)
                             thumb_count += 1
@@ -1567,18 +1993,15 @@ class GameLibraryApp(QMainWindow):
                 
                 game_files_count = 0
                 if os.path.exists(self.hidden_games_folder):
-                    for file in os.listdir(self.hidden_games_folder):
-                        if file.lower().endswith('.swf'):
-                            try:
-                                os.remove(os.path.join(self.hidden_games_folder, file))
-                                game_files_count += 1
-                            except:
-                                pass
+                    for swf_path, size in scan_swf_files(self.hidden_games_folder):
+                        try:
+                            os.remove(swf_path)
+                            game_files_count += 1
+                        except:
+                            pass
                 
-                cursor = self.db.conn.cursor()
-                cursor.execute('DELETE FROM games')
-                self.db.conn.commit()
-                self.load_games()
+                self.store.clear()
+                self.thumbnail_cache.clear()
                 
                 QMessageBox.information(self, "Library Cleared", 
                     f"✅ All games have been deleted!\n\n"
@@ -1588,30 +2011,23 @@ class GameLibraryApp(QMainWindow):
     
     def filter_games(self):
         """Filter games based on search text"""
-        search_text = self.search_input.text().lower() if self.search_input else ""
-        
-        for i in reversed(range(self.games_layout.count())): 
-            widget = self.games_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        games = self.db.get_all_games()
-        
-        visible_games = 0
-        for i, game in enumerate(games):
-            game_id, title, swf_path, thumbnail_path, added_date, last_played, play_count = game
-            
-            if search_text and search_text not in title.lower():
-                continue
-            
-            card = self.create_game_card(game_id, title, swf_path, thumbnail_path, play_count)
-            
-            row = visible_games // 4
-            col = visible_games % 4
-            self.games_layout.addWidget(card, row, col)
-            visible_games += 1
+        search_text = self.search_input.text().strip() if self.search_input else ""
+        if not search_text:
+            if self.games_view.model() is not self.games_model:
+                self.cover_loader.cancel_pending()
+                self.games_view.setModel(self.games_model)
+            return
         
-        self.games_layout.setRowStretch(self.games_layout.rowCount(), 1)
+        # Results show play counts, which must include plays still waiting in the write-behind queue
+        self.store.play_stats.flush()
+        self.search_model.set_results(self.db.search_games(search_text, CARD_COLUMNS))
+        if self.games_view.model() is not self.search_model:
+            self.games_view.setModel(self.search_model)
+    
+    def refresh_search(self):
+        """Re-run the active search, if any"""
+        if self.games_view.model() is self.search_model:
+            self.filter_games()
     
     def save_settings(self):
         """Save settings to config file"""
@@ -1625,14 +2041,53 @@ class GameLibraryApp(QMainWindow):
             else:
                 self.config["thumbnail_style"] = "default_picture"
             
-            config_path = "data/config.json"
-            with open(config_path, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            self.config["import_strategy"] = self.import_strategy_combo.currentData()
+            self.config["vault_compression"] = self.vault_compression_combo.currentData()
+            self.config["thumbnail_cache_mb"] = self.thumbnail_cache_spin.value()
+            self.config["max_running_games"] = self.max_running_spin.value()
+            self.launcher.max_running = self.config["max_running_games"]
+            self.config["prefetch_budget_mb"] = self.prefetch_budget_spin.value()
+            self.prefetcher.set_budget(self.config["prefetch_budget_mb"] * 1024 * 1024)
+            self.thumbnail_cache.set_budget(self.config["thumbnail_cache_mb"] * 1024 * 1024)
+            self.update_cache_stats_label()
+            
+            self.folder_watcher.set_roots(
+                self.config["watch_folders"], self.config["import_strategy"], self.vault_compression())
+            self.write_config()
             
             QMessageBox.information(self, "Success", "Settings saved successfully!")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save settings:\n\n{str(e)}")
+    
+    def write_config(self):
+        """Save the current configuration to the config file"""
+        config_path = "data/config.json"
+        with open(config_path, 'w') as f:
+            json.dump(self.config, f, indent=4)
+    
+    def closeEvent(self, event):
+        """Stop background workers before the window goes away"""
+        running = self.launcher.running_count()
+        if running:
+            reply = QMessageBox.question(
+                self, "Games Running",
+                f"{running} game(s) are still running.\n\nClose them and exit?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        self.launcher.shutdown()
+        self.prefetcher.shutdown()
+        self.cover_loader.shutdown()
+        self.folder_importer.shutdown()
+        self.folder_watcher.shutdown()
+        self.cover_extractor.shutdown()
+        self.vault_optimizer.shutdown()
+        self.store.close()
+        self.db.close()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,128 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Worker processes; parsing and compressing SWF files is CPU-bound Python, so one per core
+POOL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# Games read from the database per query
+FETCH_SIZE = 500
+
+
+class PoolJob(QObject):
+    """Runs one function over many games on a pool of worker processes
+    
+    Subclasses set function (a module-level function, so it can be sent
+    to the workers) and say which rows to read (fetch_rows), what to run
+    for each row (job_for) and what to do with each result back on the
+    GUI thread (handle_result). Rows are read from the database and handed
+    to the pool a few at a time as results come back, so memory use
+    doesn't grow with the library. Workers are spawned, not forked: the
+    GUI process has Qt threads that a fork would copy mid-flight.
+    """
+    
+    progress = pyqtSignal()
+    finished = pyqtSignal()
+    # Job key and the function's result (None if it failed or was cancelled); emitted from the pool's result thread
+    result_ready = pyqtSignal(object, object)
+    
+    function = None
+    
+    def __init__(self, queue_ahead, parent=None):
+        super().__init__(parent)
+        # Jobs handed to the pool ahead of the results, so a huge library isn't queued all at once
+        self.queue_ahead = queue_ahead
+        self.executor = None
+        self.running = False
+        self.cancelled = False
+        self.result_ready.connect(self.on_result)
+    
+    def fetch_rows(self, after_id, limit):
+        """Return up to limit rows after after_id, each starting with a game id"""
+        raise NotImplementedError
+    
+    def job_for(self, row):
+        """Return (key, arguments of function) for a row, or None to skip it"""
+        raise NotImplementedError
+    
+    def handle_result(self, key, result):
+        """Act on one job's result on the GUI thread"""
+        raise NotImplementedError
+    
+    def start(self):
+        self.running = True
+        self.cancelled = False
+        self.done = 0
+        self.futures = {}
+        self.queue = deque()
+        self.after_id = 0
+        self.exhausted = False
+        self.executor = ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        self.submit_more()
+        self.check_finished()
+    
+    def submit_more(self):
+        """Keep queue_ahead jobs in the pool, reading the next games from the database as needed"""
+        while not self.cancelled and len(self.futures) < self.queue_ahead:
+            if not self.queue:
+                if self.exhausted:
+                    return
+                rows = self.fetch_rows(self.after_id, FETCH_SIZE)
+                if not rows:
+                    self.exhausted = True
+                    return
+                self.after_id = rows[-1][0]
+                self.queue.extend(rows)
+            job = self.job_for(self.queue.popleft())
+            if job is None:
+                self.done += 1
+                continue
+            key, args = job
+            future = self.executor.submit(self.function, *args)
+            self.futures[key] = future
+            future.add_done_callback(lambda future, key=key: self.on_done(key, future))
+    
+    def on_done(self, key, future):
+        # Runs on the pool's thread; the signal takes the result to the GUI thread
+        result = None
+        if not future.cancelled():
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"{self.function.__name__} failed for {key}: {e}")
+        self.result_ready.emit(key, result)
+    
+    def on_result(self, key, result):
+        self.futures.pop(key, None)
+        self.done += 1
+        self.handle_result(key, result)
+        self.submit_more()
+        self.progress.emit()
+        self.check_finished()
+    
+    def cancel(self):
+        """Stop handing out jobs; jobs already running still finish"""
+        if self.running:
+            self.cancelled = True
+            for future in list(self.futures.values()):
+                future.cancel()
+    
+    def check_finished(self):
+        if not self.running or self.futures or not (self.cancelled or self.exhausted):
+            return
+        self.running = False
+        # Worker processes hold memory; start a fresh pool for the next run
+        self.executor.shutdown(wait=False)
+        self.executor = None
+        self.finished.emit()
+    
+    def shutdown(self):
+        """Cancel and wait for the worker processes"""
+        self.blockSignals(True)
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
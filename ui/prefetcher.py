@@ -0,0 +1,237 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# Bytes of game files kept warm unless the config says otherwise; 0 turns prefetching off
+DEFAULT_BUDGET_MB = 256
+
+# Quiet time in the library before the likeliest games are warmed
+IDLE_DELAY_MS = 3000
+
+# How long the mouse has to rest on a card before its file is warmed
+HOVER_DELAY_MS = 150
+
+# A warmed file may have been evicted from the page cache after this long; launches after it don't count as hits
+WARM_TTL_S = 10 * 60
+
+# Warmed files older than this are warmed again, so the likeliest games stay warm past WARM_TTL_S
+REWARM_AGE_S = WARM_TTL_S // 2
+
+# Games considered from each of the recently played and most played lists
+CANDIDATES = 40
+
+# Bytes read per step where posix_fadvise isn't available
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def warm_file(path):
+    """Ask the OS to pull a file into the page cache; returns its size
+    
+    posix_fadvise(WILLNEED) starts readahead of the whole file and returns
+    without waiting for it. Where it doesn't exist (Windows, macOS) the
+    file is read through once instead, which leaves it cached too.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while f.read(READ_CHUNK_SIZE):
+                pass
+    return size
+
+
+class PrefetchSignals(QObject):
+    """Signals for PrefetchTask (QRunnable can't define its own)"""
+    
+    # path and size of a file that has been warmed
+    warmed = pyqtSignal(str, int)
+    # path of a file that is missing, unreadable or bigger than the whole budget
+    skipped = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class PrefetchTask(QRunnable):
+    """Warms files in order, skipping any that would take it past budget bytes
+    
+    total_budget is the prefetcher's whole budget; files bigger than it
+    are reported as skipped so they aren't tried again.
+    """
+    
+    def __init__(self, paths, budget, total_budget, signals, stopping):
+        super().__init__()
+        self.paths = paths
+        self.budget = budget
+        self.total_budget = total_budget
+        self.signals = signals
+        self.stopping = stopping
+    
+    def run(self):
+        for path in self.paths:
+            if self.stopping.is_set():
+                break
+            try:
+                size = os.path.getsize(path)
+                if size > self.budget:
+                    if size > self.total_budget:
+                        self.signals.skipped.emit(path)
+                    continue
+                size = warm_file(path)
+            except OSError as e:
+                print(f"Failed to prefetch {path}: {e}")
+                self.signals.skipped.emit(path)
+                continue
+            self.budget -= size
+            self.signals.warmed.emit(path, size)
+        self.signals.finished.emit()
+
+
+class GamePrefetcher(QObject):
+    """Warms the page cache with the games most likely to be played next
+    
+    Once the library has been idle for IDLE_DELAY_MS, the recently and
+    most played games are ranked by play count and how recently they were
+    played, and their files are warmed on a worker thread until budget
+    bytes are warm. Resting the mouse on a card warms that game's file
+    straight away. A cold launch from a hard drive or USB stick then
+    starts without waiting on the disk. Every launch is checked against
+    the files warmed in the last WARM_TTL_S seconds so the hit rate can be
+    shown.
+    """
+    
+    def __init__(self, db, budget, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.budget = budget
+        # path -> (size, time.monotonic() it was warmed)
+        self.warmed = {}
+        # Files that can't be warmed, not tried again until the budget changes
+        self.unwarmable = set()
+        self.launches = 0
+        self.hits = 0
+        self.running = False
+        self.hovered_path = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = PrefetchSignals(self)
+        self.signals.warmed.connect(self.on_warmed)
+        self.signals.skipped.connect(self.unwarmable.add)
+        self.signals.finished.connect(self.on_task_finished)
+        self.stopping = threading.Event()
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(IDLE_DELAY_MS)
+        self.idle_timer.timeout.connect(self.prefetch_likely)
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(HOVER_DELAY_MS)
+        self.hover_timer.timeout.connect(self.prefetch_hovered)
+        # Page cache entries age out; every REWARM_AGE_S the likeliest games are warmed again
+        self.rewarm_timer = QTimer(self)
+        self.rewarm_timer.setInterval(REWARM_AGE_S * 1000)
+        self.rewarm_timer.timeout.connect(self.prefetch_likely)
+        self.note_activity()
+    
+    def set_budget(self, budget):
+        self.budget = budget
+        self.unwarmable.clear()
+        self.note_activity()
+    
+    def note_activity(self):
+        """Put off idle prefetching until the library has been quiet for IDLE_DELAY_MS"""
+        if self.budget > 0:
+            self.idle_timer.start()
+            if not self.rewarm_timer.isActive():
+                self.rewarm_timer.start()
+        else:
+            self.rewarm_timer.stop()
+    
+    def hover(self, swf_path):
+        """The mouse is on a game's card"""
+        self.hovered_path = swf_path
+        self.note_activity()
+        if self.budget > 0 and swf_path and not self.is_warm(swf_path) and swf_path not in self.unwarmable:
+            self.hover_timer.start()
+    
+    def is_warm(self, path, max_age=WARM_TTL_S):
+        """Whether path was warmed within the last max_age seconds"""
+        warmed = self.warmed.get(path)
+        return warmed is not None and time.monotonic() - warmed[1] < max_age
+    
+    def warm_bytes(self, max_age=WARM_TTL_S):
+        """Bytes of files warmed within the last max_age seconds"""
+        now = time.monotonic()
+        for path in [path for path, (size, warmed_at) in self.warmed.items() if now - warmed_at >= WARM_TTL_S]:
+            del self.warmed[path]
+        return sum(size for size, warmed_at in self.warmed.values() if now - warmed_at < max_age)
+    
+    def likely_games(self):
+        """Return swf paths of the games most likely to be played next, likeliest first"""
+        columns = ('id', 'swf_path', 'play_count', 'last_played')
+        games = {}
+        for ranking in ('last_played', 'play_count'):
+            for game in self.db.get_top_games(ranking, CANDIDATES, columns):
+                games[game.id] = game
+        now = datetime.now(timezone.utc)
+        
+        def score(game):
+            # Plays, discounted by the days since the last one
+            if not game.last_played:
+                return game.play_count
+            last_played = datetime.strptime(game.last_played, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            days = max((now - last_played).total_seconds() / 86400, 0)
+            return (game.play_count or 0) / (1 + days)
+        
+        ranked = sorted(games.values(), key=score, reverse=True)
+        return list(dict.fromkeys(game.swf_path for game in ranked))
+    
+    def prefetch_likely(self):
+        if self.running or self.budget <= 0:
+            return
+        # Files due for re-warming are candidates again, and their bytes go back into the budget
+        remaining = self.budget - self.warm_bytes(REWARM_AGE_S)
+        paths = [path for path in self.likely_games()
+                 if not self.is_warm(path, REWARM_AGE_S) and path not in self.unwarmable]
+        if remaining > 0 and paths:
+            self.start_task(paths, remaining)
+    
+    def prefetch_hovered(self):
+        if self.running or not self.hovered_path or self.is_warm(self.hovered_path):
+            return
+        path, self.hovered_path = self.hovered_path, None
+        remaining = self.budget - self.warm_bytes()
+        if remaining > 0:
+            self.start_task([path], remaining)
+    
+    def start_task(self, paths, budget):
+        self.running = True
+        self.pool.start(PrefetchTask(paths, budget, self.budget, self.signals, self.stopping))
+    
+    def on_warmed(self, path, size):
+        self.warmed[path] = (size, time.monotonic())
+    
+    def on_task_finished(self):
+        self.running = False
+        # A hover that came in while the task ran
+        if self.hovered_path and not self.is_warm(self.hovered_path):
+            self.hover_timer.start()
+    
+    def record_launch(self, swf_path):
+        """Count a launch, and whether its file had been warmed"""
+        self.launches += 1
+        if self.is_warm(swf_path):
+            self.hits += 1
+    
+    def hit_stats(self):
+        """Return (launches, launches whose file was warm)"""
+        return self.launches, self.hits
+    
+    def shutdown(self):
+        self.stopping.set()
+        self.idle_timer.stop()
+        self.hover_timer.stop()
+        self.rewarm_timer.stop()
+        self.pool.waitForDone()
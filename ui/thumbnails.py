@@ -0,0 +1,335 @@
+import os
+import hashlib
+import shutil
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QLinearGradient, QColor, QFont
+
+# Bump when render_name_thumbnail changes so old generated covers are not reused
+NAME_THUMBNAIL_VERSION = 1
+
+
+def render_name_thumbnail(title, width=180, height=140):
+    """Render the "name background" cover (gradient, ellipse, wrapped title) onto a QImage
+    
+    Only QImage is used so this can run on a worker thread.
+    """
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    
+    # Create gradient background
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(70, 70, 120))
+    gradient.setColorAt(1, QColor(30, 30, 60))
+    
+    painter = QPainter(image)
+    painter.fillRect(image.rect(), gradient)
+    
+    # Draw game icon
+    painter.setPen(QColor(100, 200, 255, 150))
+    painter.setBrush(QColor(100, 200, 255, 50))
+    painter.drawEllipse(width // 2, height * 50 // 140, 60, 60)
+    
+    # Draw game title
+    painter.setPen(QColor(255, 255, 255))
+    painter.setFont(QFont("Arial", 11, QFont.Weight.Bold))
+    
+    # Split title if too long
+    if len(title) > 15:
+        words = title.split()
+        lines = []
+        current_line = ""
+        
+        for word in words:
+            if len(current_line) + len(word) + 1 <= 15:
+                current_line += (" " if current_line else "") + word
+            else:
+                if current_line:
+                    lines.append(current_line)
+                current_line = word
+        
+        if current_line:
+            lines.append(current_line)
+        
+        # Draw multiple lines
+        font_metrics = painter.fontMetrics()
+        line_height = font_metrics.height()
+        total_height = len(lines) * line_height
+        start_y = (height - total_height) // 2 + font_metrics.ascent()
+        
+        for i, line in enumerate(lines):
+            text_rect = font_metrics.boundingRect(line)
+            x = (width - text_rect.width()) // 2
+            y = start_y + (i * line_height)
+            painter.drawText(x, y, line)
+    else:
+        # Draw single line
+        text_rect = painter.fontMetrics().boundingRect(title)
+        x = (width - text_rect.width()) // 2
+        y = (height - text_rect.height()) // 2 + painter.fontMetrics().ascent()
+        painter.drawText(x, y, title)
+    
+    # Draw "Flash Game" label
+    painter.setFont(QFont("Arial", 8))
+    painter.setPen(QColor(200, 200, 200))
+    painter.drawText(image.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter, "FLASH GAME")
+    
+    painter.end()
+    
+    return image
+
+
+class PixmapCache:
+    """Least-recently-used QPixmap cache bounded by an approximate memory budget
+    
+    Each pixmap is charged width * height * depth / 8 bytes. Inserting past
+    the budget evicts the least recently used entries. Hit, miss and eviction
+    counts are kept so the budget can be tuned.
+    """
+    
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def cost(pixmap):
+        if pixmap.isNull():
+            return 0
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+    
+    def get(self, key):
+        """Return the cached pixmap for key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+    
+    def put(self, key, pixmap):
+        self.pop(key)
+        cost = self.cost(pixmap)
+        self.entries[key] = (pixmap, cost)
+        self.used_bytes += cost
+        self.evict()
+    
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return default
+        self.used_bytes -= entry[1]
+        return entry[0]
+    
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evict()
+    
+    def evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            key, (pixmap, cost) = self.entries.popitem(last=False)
+            self.used_bytes -= cost
+            self.evictions += 1
+    
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def __contains__(self, key):
+        return key in self.entries
+    
+    def __len__(self):
+        return len(self.entries)
+
+
+class ThumbnailCache:
+    """Persistent cache of covers pre-scaled to card size
+    
+    Entries live in one folder per source path, named after a stamp of the
+    source's mtime/size and the target size, so an edited or replaced cover
+    is never served stale and the original only has to be decoded once.
+    """
+    
+    def __init__(self, cache_folder):
+        self.cache_folder = cache_folder
+        os.makedirs(self.cache_folder, exist_ok=True)
+    
+    def source_folder(self, source_path):
+        """Folder holding every cached entry of one source image"""
+        normalized = os.path.normcase(os.path.abspath(source_path))
+        return os.path.join(self.cache_folder, hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:20])
+    
+    def entry_path(self, source_path, width, height):
+        """Return the cache file for source_path at the given size, or None if the source is missing"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        stamp = f"{stat.st_mtime_ns}:{stat.st_size}:{width}x{height}"
+        stamp_hash = hashlib.sha1(stamp.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.source_folder(source_path), f"{stamp_hash}.png")
+    
+    def load(self, source_path, width, height):
+        """Return a QImage of source_path scaled to fit width x height, decoding the original only on a miss"""
+        entry = self.entry_path(source_path, width, height)
+        if entry is None:
+            return QImage()
+        
+        if os.path.exists(entry):
+            image = QImage(entry)
+            if not image.isNull():
+                return image
+        
+        image = self.decode_scaled(source_path, width, height)
+        if image.isNull():
+            return image
+        
+        # Drop entries for older versions of this source before storing the new one
+        self.invalidate(source_path)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            image.save(entry, "PNG")
+        except Exception as e:
+            print(f"Failed to cache thumbnail: {e}")
+        return image
+    
+    def decode_scaled(self, source_path, width, height):
+        """Decode source_path straight to a size that fits width x height
+        
+        QImageReader.setScaledSize lets formats like JPEG decode at reduced
+        resolution, so a full-size bitmap of a multi-megapixel cover is never
+        produced.
+        """
+        reader = QImageReader(source_path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid():
+            if size.width() > width or size.height() > height:
+                reader.setScaledSize(size.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio))
+            return reader.read()
+        
+        # Formats that can't report their size up front
+        image = reader.read()
+        if image.isNull():
+            return image
+        return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    
+    def load_generated(self, title, style, width, height):
+        """Return the generated cover for title, rendering and storing it only the first time"""
+        key = f"{NAME_THUMBNAIL_VERSION}:{style}:{width}x{height}:{title}"
+        entry = os.path.join(self.cache_folder, "generated", hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + ".png")
+        
+        if os.path.exists(entry):
+            image = QImage(entry)
+            if not image.isNull():
+                return image
+        
+        image = render_name_thumbnail(title, width, height)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            image.save(entry, "PNG")
+        except Exception as e:
+            print(f"Failed to cache generated thumbnail: {e}")
+        return image
+    
+    def invalidate(self, source_path):
+        """Delete every cached entry for source_path"""
+        if not source_path:
+            return
+        shutil.rmtree(self.source_folder(source_path), ignore_errors=True)
+
+
+class CoverLoadSignals(QObject):
+    """Signals for CoverLoadTask (QRunnable can't define its own)"""
+    
+    finished = pyqtSignal(object, QImage)
+
+
+class CoverLoadTask(QRunnable):
+    """Produces one cover image on a worker thread by calling load()"""
+    
+    def __init__(self, key, load):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.key = key
+        self.load = load
+        self.signals = CoverLoadSignals()
+    
+    def run(self):
+        try:
+            image = self.load()
+        except Exception as e:
+            print(f"Failed to load cover {self.key}: {e}")
+            image = QImage()
+        self.signals.finished.emit(self.key, image)
+
+
+class CoverLoader(QObject):
+    """Decodes covers on a thread pool and reports each one as it is ready
+    
+    Newer requests run first, since they come from the cards painted most
+    recently. Requests that haven't started yet can be dropped with
+    cancel_pending() when the visible cards change, so decodes for cards
+    that scrolled away don't hold up the ones on screen.
+    """
+    
+    cover_loaded = pyqtSignal(object, QImage)
+    
+    def __init__(self, cache, width, height, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.width = width
+        self.height = height
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self.pending = {}
+        self.next_priority = 0
+    
+    def request(self, source_path):
+        """Queue an image file for decoding; cover_loaded reports it under its path"""
+        self.start(source_path, lambda: self.cache.load(source_path, self.width, self.height))
+    
+    def request_generated(self, title, style):
+        """Queue a name-based cover; cover_loaded reports it under (title, style, width, height)"""
+        key = (title, style, self.width, self.height)
+        self.start(key, lambda: self.cache.load_generated(title, style, self.width, self.height))
+    
+    def start(self, key, load):
+        if key in self.pending:
+            return
+        task = CoverLoadTask(key, load)
+        task.signals.finished.connect(self.on_task_finished)
+        self.pending[key] = task
+        self.next_priority += 1
+        self.pool.start(task, self.next_priority)
+    
+    def cancel_pending(self):
+        """Drop every request that hasn't started yet"""
+        for key, task in list(self.pending.items()):
+            if self.pool.tryTake(task):
+                del self.pending[key]
+    
+    def on_task_finished(self, key, image):
+        self.pending.pop(key, None)
+        self.cover_loaded.emit(key, image)
+    
+    def shutdown(self):
+        self.cancel_pending()
+        self.pool.waitForDone()
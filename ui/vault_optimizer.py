@@ -0,0 +1,58 @@
+import os
+
+from swf import compress_stored_swf
+from ui.pool_job import PoolJob, POOL_WORKERS
+
+# Files handed to the pool ahead of the results; compressing takes a while, so two per worker is plenty
+QUEUE_AHEAD = POOL_WORKERS * 2
+
+
+class VaultOptimizer(PoolJob):
+    """Compresses the uncompressed SWF files already in the games folder
+    
+    Each stored FWS file is compressed in place by swf.compress_stored_swf
+    on a pool of worker processes and keeps its name, so games, play
+    history and duplicate detection are untouched. Every file tried is
+    recorded with its old and new size, including files compression
+    didn't shrink enough, so no file is tried twice. Only files inside
+    the games folder are touched; games added from their original
+    location are left alone.
+    """
+    
+    function = staticmethod(compress_stored_swf)
+    
+    def __init__(self, db, games_folder, parent=None):
+        super().__init__(QUEUE_AHEAD, parent)
+        self.db = db
+        self.games_folder = games_folder
+    
+    def start(self, compression):
+        self.compression = compression
+        self.total = self.db.count_compression_candidates()
+        self.shrunk = 0
+        self.failed = 0
+        self.bytes_saved = 0
+        self.seen_paths = set()
+        super().start()
+    
+    def fetch_rows(self, after_id, limit):
+        return self.db.get_compression_candidates(after_id, limit)
+    
+    def job_for(self, row):
+        game_id, swf_path, content_hash = row
+        if swf_path in self.seen_paths or self.games_folder not in swf_path or not os.path.exists(swf_path):
+            # Shared with a game already handled, outside the games folder, or missing
+            return None
+        self.seen_paths.add(swf_path)
+        return (swf_path, content_hash), (swf_path, self.compression)
+    
+    def handle_result(self, key, result):
+        swf_path, content_hash = key
+        if result is not None:
+            original_size, stored_size, signature = result
+            self.db.record_compression(content_hash, original_size, stored_size, swf_path, signature)
+            if stored_size < original_size:
+                self.shrunk += 1
+                self.bytes_saved += original_size - stored_size
+        elif not self.cancelled:
+            self.failed += 1
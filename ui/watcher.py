@@ -0,0 +1,280 @@
+import os
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+
+from ui.importer import walk_swf_files, hash_file, store_content, read_header
+from swf import COMPRESSION_METHODS
+
+# Quiet time after a change before a watched folder is rescanned; a copy in progress fires many events
+SYNC_DELAY_MS = 1000
+
+# Watched files stay where they are and may change later, so they are never
+# moved away and never share an inode with the library's copy
+WATCH_STRATEGIES = {'auto': 'reflink', 'reflink': 'reflink', 'hardlink': 'copy', 'move': 'copy', 'copy': 'copy'}
+
+
+class WatchScanResult:
+    """What changed in one watched folder since its manifest was written"""
+    
+    def __init__(self, root):
+        self.root = root
+        # False if the folder itself was missing (unplugged drive, deleted folder)
+        self.available = True
+        # Every folder below root, for the file system watcher
+        self.folders = []
+        # (path, size, mtime_ns, stored path, content hash, header, duplicate of a game already in the library)
+        self.added = []
+        # (path, size, mtime_ns, game id, stored path, content hash, header); stored path is None if the game is gone
+        self.changed = []
+        # (path, game id)
+        self.removed = []
+        self.unchanged = 0
+        self.failed = 0
+
+
+class WatchScanSignals(QObject):
+    """Signals for WatchScanTask (QRunnable can't define its own)"""
+    
+    finished = pyqtSignal(object)
+
+
+class WatchScanTask(QRunnable):
+    """Compares a watched folder with its manifest and stores new or changed files
+    
+    Files whose size and mtime match the manifest are not opened, so
+    rescanning an unchanged tree costs one scandir and one stat per file.
+    """
+    
+    def __init__(self, root, db, destination_folder, strategy, compression, signals, stopping):
+        super().__init__()
+        self.root = root
+        self.db = db
+        self.destination_folder = destination_folder
+        self.strategy = strategy
+        self.compression = compression
+        self.signals = signals
+        self.stopping = stopping
+    
+    def run(self):
+        result = WatchScanResult(self.root)
+        if not os.path.isdir(self.root):
+            # Don't take a missing folder to mean every file in it was deleted
+            result.available = False
+            self.signals.finished.emit(result)
+            return
+        
+        manifest = self.db.get_watch_manifest(self.root)
+        seen = set()
+        unreadable = []
+        for path, stat in walk_swf_files(self.root, self.stopping, result.folders, unreadable):
+            seen.add(path)
+            recorded = manifest.get(path)
+            if recorded is not None and recorded[0] == stat.st_size and recorded[1] == stat.st_mtime_ns:
+                result.unchanged += 1
+                continue
+            try:
+                content_hash = hash_file(path)
+                game_id = recorded[2] if recorded is not None else None
+                if game_id is None and self.db.find_game_by_hash(content_hash) is not None:
+                    result.added.append((path, stat.st_size, stat.st_mtime_ns, None, content_hash, None, True))
+                    continue
+                if game_id is not None and self.db.get_game(game_id, ('id',)) is None:
+                    # The game was removed from the library; don't store a file nothing will use
+                    result.changed.append((path, stat.st_size, stat.st_mtime_ns, game_id, None, content_hash, None))
+                    continue
+                stored_path, content_hash, method = store_content(
+                    path, self.destination_folder, content_hash, self.strategy, self.compression)
+                if method in COMPRESSION_METHODS:
+                    self.db.record_compression(content_hash, stat.st_size, os.path.getsize(stored_path))
+                header = read_header(stored_path)
+                if game_id is None:
+                    result.added.append((path, stat.st_size, stat.st_mtime_ns, stored_path, content_hash, header, False))
+                else:
+                    result.changed.append(
+                        (path, stat.st_size, stat.st_mtime_ns, game_id, stored_path, content_hash, header))
+            except OSError as e:
+                # Probably still being written; the next change event retries it
+                print(f"Failed to sync {path}: {e}")
+                result.failed += 1
+        
+        if self.stopping.is_set():
+            # The walk was cut short, so missing files don't mean deleted ones
+            return
+        
+        unreadable_prefixes = tuple(folder + os.sep for folder in unreadable)
+        for path, (size, mtime_ns, game_id) in manifest.items():
+            if path not in seen and not path.startswith(unreadable_prefixes):
+                result.removed.append((path, game_id))
+        self.signals.finished.emit(result)
+
+
+class FolderWatcher(QObject):
+    """Keeps the library in step with a set of watched folders
+    
+    Every folder below a watched root is registered with a
+    QFileSystemWatcher (inotify on Linux). A change schedules a rescan of
+    its root on a worker thread, compared against the stored
+    (path, size, mtime) manifest, so only new, changed and deleted files
+    cost any work. New files are added as games, changed files swap the
+    game's stored file but keep its title and play history, and deleted
+    files remove their game. Directory watches don't report a file being
+    rewritten in place; such edits are picked up by the next rescan.
+    """
+    
+    # root, games added, games updated, games removed
+    synced = pyqtSignal(str, int, int, int)
+    # Cover image of a game removed because its file was deleted
+    cover_released = pyqtSignal(str)
+    
+    def __init__(self, store, destination_folder, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.destination_folder = destination_folder
+        self.strategy = 'auto'
+        self.compression = None
+        self.roots = []
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = WatchScanSignals(self)
+        self.signals.finished.connect(self.on_scan_finished)
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self.on_directory_changed)
+        # Roots waiting for the debounce timer, being scanned, and changed again during their scan
+        self.pending = set()
+        self.scanning = set()
+        self.dirty = set()
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(SYNC_DELAY_MS)
+        self.sync_timer.timeout.connect(self.start_pending)
+        self.stopping = threading.Event()
+    
+    def set_roots(self, roots, strategy='auto', compression=None):
+        """Watch exactly these folders and rescan any that are new"""
+        self.strategy = WATCH_STRATEGIES.get(strategy, 'copy')
+        self.compression = compression
+        roots = [os.path.abspath(root) for root in roots]
+        for root in self.roots:
+            if root not in roots:
+                self.unwatch(root)
+        for root in roots:
+            if root not in self.roots:
+                self.roots.append(root)
+                self.sync(root)
+    
+    def unwatch(self, root):
+        self.roots.remove(root)
+        self.pending.discard(root)
+        watched = [path for path in self.fs_watcher.directories() if self.root_of(path, [root])]
+        if watched:
+            self.fs_watcher.removePaths(watched)
+        # Games already imported stay; only the record of the folder goes
+        self.store.db.delete_watch_manifest(root)
+    
+    def root_of(self, path, roots=None):
+        """Return the watched root containing path, or None"""
+        for root in roots if roots is not None else self.roots:
+            if path == root or path.startswith(root + os.sep):
+                return root
+        return None
+    
+    def on_directory_changed(self, path):
+        root = self.root_of(path)
+        if root is not None:
+            self.pending.add(root)
+            self.sync_timer.start()
+    
+    def sync(self, root):
+        """Rescan root now, or as soon as its current scan finishes"""
+        self.pending.add(root)
+        self.start_pending()
+    
+    def sync_all(self):
+        for root in self.roots:
+            self.sync(root)
+    
+    def start_pending(self):
+        for root in list(self.pending):
+            self.pending.discard(root)
+            if root in self.scanning:
+                self.dirty.add(root)
+                continue
+            self.scanning.add(root)
+            self.pool.start(WatchScanTask(
+                root, self.store.db, self.destination_folder, self.strategy, self.compression,
+                self.signals, self.stopping))
+    
+    def on_scan_finished(self, result):
+        root = result.root
+        self.scanning.discard(root)
+        if root in self.roots and result.available:
+            self.apply_scan(result)
+        if root in self.dirty:
+            # Only now, so the rescan sees the games and manifest rows this scan just saved
+            self.dirty.discard(root)
+            self.sync(root)
+    
+    def apply_scan(self, result):
+        """Add, update and remove games for one finished scan and save its manifest"""
+        root = result.root
+        new_folders = set(result.folders) - set(self.fs_watcher.directories())
+        if new_folders:
+            self.fs_watcher.addPaths(sorted(new_folders))
+        
+        entries = []
+        new_games = []
+        for path, size, mtime_ns, stored_path, content_hash, header, duplicate in result.added:
+            if duplicate:
+                # Already in the library from elsewhere: track the file but don't add it twice
+                entries.append((path, size, mtime_ns, None))
+            else:
+                title = os.path.splitext(os.path.basename(path))[0]
+                new_games.append((title, stored_path, None, content_hash, header))
+        new_entries = [entry for entry in result.added if not entry[6]]
+        game_ids = self.store.add_games(new_games) if new_games else []
+        for (path, size, mtime_ns, *rest), game_id in zip(new_entries, game_ids):
+            entries.append((path, size, mtime_ns, game_id))
+        
+        updated_games = 0
+        for path, size, mtime_ns, game_id, stored_path, content_hash, header in result.changed:
+            game = self.store.get(game_id)
+            if game and stored_path:
+                self.store.set_game_file(game_id, stored_path, content_hash, header)
+                self.release_file(game.swf_path)
+                updated_games += 1
+            else:
+                # Removed from the library during the scan; drop the file stored for it
+                self.release_file(stored_path)
+            entries.append((path, size, mtime_ns, game_id))
+        
+        removed_paths = []
+        removed_games = 0
+        for path, game_id in result.removed:
+            removed_paths.append(path)
+            game = self.store.get(game_id) if game_id is not None else None
+            if game:
+                self.store.remove_game(game_id)
+                self.release_file(game.swf_path)
+                if game.thumbnail_path:
+                    self.cover_released.emit(game.thumbnail_path)
+                removed_games += 1
+        
+        if entries or removed_paths:
+            self.store.db.update_watch_manifest(root, entries, removed_paths)
+        if new_games or updated_games or removed_games:
+            self.synced.emit(root, len(game_ids), updated_games, removed_games)
+    
+    def release_file(self, swf_path):
+        """Delete a stored game file once no game uses it"""
+        if (swf_path and self.destination_folder in swf_path and os.path.exists(swf_path)
+                and self.store.db.count_games_with_swf_path(swf_path) == 0):
+            try:
+                os.remove(swf_path)
+            except OSError as e:
+                print(f"Failed to delete {swf_path}: {e}")
+    
+    def shutdown(self):
+        self.stopping.set()
+        self.sync_timer.stop()
+        self.pool.waitForDone()